@@ -4,26 +4,38 @@ Video Merger & Audio to Video Converter Web Application
 """
 
 import os
-import uuid
+import itertools
 import tempfile
 import shutil
 import gc
 import signal
 import time
+import heapq
+import functools
+import mimetypes
 from pathlib import Path
-from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for
+from urllib.parse import quote
+from flask import Flask, Request, Response, render_template, request, jsonify, send_file, redirect, url_for
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 import logging
 from datetime import datetime
 import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import psutil
 
 from video_merger import VideoMerger
 from audio_to_video import AudioToVideoConverter
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=logging.INFO, force=True)
 logger = logging.getLogger(__name__)
 
+# Media work happens in ffmpeg subprocesses, so the Python heap sees little cyclic
+# garbage; collect less often instead of forcing a full collection per request
+gc.set_threshold(50000, 100, 100)
+
 app = Flask(__name__)
 
 # File size configuration (in bytes) - Reduced for free tier
@@ -32,105 +44,391 @@ MAX_TOTAL_SIZE = int(os.environ.get('MAX_TOTAL_SIZE', 200 * 1024 * 1024))  # 200
 app.config['MAX_CONTENT_LENGTH'] = MAX_TOTAL_SIZE
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['OUTPUT_FOLDER'] = 'output'
+# Where in-flight uploads are written; keep it on the same filesystem as UPLOAD_FOLDER
+app.config['UPLOAD_TMP_FOLDER'] = os.environ.get('UPLOAD_TMP_FOLDER', app.config['UPLOAD_FOLDER'])
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-change-this')
+# Let Apache/lighttpd stream downloads via X-Sendfile instead of the worker
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
+# Internal nginx location that maps to OUTPUT_FOLDER, e.g. /protected/
+X_ACCEL_REDIRECT_PREFIX = os.environ.get('X_ACCEL_REDIRECT_PREFIX')
 
 # Create necessary directories
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs(app.config['OUTPUT_FOLDER'], exist_ok=True)
+os.makedirs(app.config['UPLOAD_TMP_FOLDER'], exist_ok=True)
+
+# Uploads are written through a large buffer so each write(2) moves ~1MB instead
+# of one multipart parser chunk
+UPLOAD_BUFFER_SIZE = int(os.environ.get('UPLOAD_BUFFER_SIZE', 1024 * 1024))
+
+# Uploads can only be linked into place when both folders share a device
+UPLOAD_SAME_DEVICE = os.stat(app.config['UPLOAD_TMP_FOLDER']).st_dev == os.stat(app.config['UPLOAD_FOLDER']).st_dev
+
+class UploadFile:
+    """Upload target that counts bytes as they arrive and aborts past MAX_FILE_SIZE."""
+
+    def __init__(self, file, filename):
+        self._file = file
+        self.filename = filename
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > MAX_FILE_SIZE:
+            raise RequestEntityTooLarge(f'File {self.filename} is too large. Maximum size is {MAX_FILE_SIZE_TEXT}')
+        return self._file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+class UploadRequest(Request):
+    """Request that streams uploaded files straight into the upload folder."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        # Werkzeug spools uploads into memory or /tmp by default, and file.save()
+        # then copies every byte again into UPLOAD_FOLDER. Writing the multipart
+        # body directly next to the upload folder lets us link it into place instead.
+        return UploadFile(tempfile.NamedTemporaryFile(
+            dir=app.config['UPLOAD_TMP_FOLDER'],
+            prefix='.upload-',
+            buffering=UPLOAD_BUFFER_SIZE
+        ), filename)
+
+app.request_class = UploadRequest
 
 # Allowed file extensions
-ALLOWED_VIDEO_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv', 'wmv', 'flv', 'webm', 'm4v'}
-ALLOWED_AUDIO_EXTENSIONS = {'mov', 'mp3', 'wav', 'aac', 'm4a', 'flac', 'ogg', 'wma'}
+ALLOWED_VIDEO_EXTENSIONS = frozenset({'mp4', 'avi', 'mov', 'mkv', 'wmv', 'flv', 'webm', 'm4v'})
+ALLOWED_AUDIO_EXTENSIONS = frozenset({'mov', 'mp3', 'wav', 'aac', 'm4a', 'flac', 'ogg', 'wma'})
+
+# Leading bytes of the containers we accept, so a renamed non-media file is
+# rejected before ffmpeg spends seconds probing it
+MEDIA_SIGNATURES = (
+    b'RIFF',                        # AVI, WAV
+    b'\x1aE\xdf\xa3',               # Matroska, WebM
+    b'0&\xb2u\x8ef\xcf\x11',        # ASF (WMV, WMA)
+    b'FLV',                         # Flash video
+    b'ID3',                         # MP3 with ID3 tag
+    b'fLaC',                        # FLAC
+    b'OggS',                        # Ogg
+)
+# ISO/QuickTime files (MP4, MOV, M4V, M4A) start with a box size then its type
+MEDIA_BOX_TYPES = frozenset({b'ftyp', b'moov', b'mdat', b'wide', b'free', b'skip', b'pnot'})
+
+# Batches usually repeat the same handful of names
+cached_secure_filename = functools.lru_cache(maxsize=2048)(secure_filename)
 
 # Global timeout for video processing (5 minutes)
 PROCESSING_TIMEOUT = 300
 
-class TimeoutError(Exception):
+# Worker processes for merge/convert jobs; created lazily in each gunicorn worker,
+# so the total is GUNICORN_WORKERS x PROCESSING_WORKERS
+PROCESSING_WORKERS = int(os.environ.get('PROCESSING_WORKERS', 1))
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+# Uploaded and generated files are removed after 30 minutes
+FILE_TTL = 1800
+SWEEP_INTERVAL = 60
+# Full folder scans catch files nobody scheduled, such as partial outputs of
+# jobs killed on timeout
+FULL_SCAN_INTERVAL = 600
+
+# Min-heap of (expiry time, path) consumed by the background sweeper
+_cleanup_heap = []
+_cleanup_lock = threading.Lock()
+_sweeper_pid = None
+
+# Output filename suffixes only need to be unique, not random; seeding from the
+# clock keeps them from colliding with files left over from a previous run
+_unique_counter = itertools.count(time.time_ns() // 1000)
+
+class JobTimeoutError(Exception):
     """Custom timeout exception."""
     pass
 
 def timeout_handler(signum, frame):
     """Handle timeout signal."""
-    raise TimeoutError("Processing timeout")
+    raise JobTimeoutError("Processing timeout")
 
 def allowed_file(filename, allowed_extensions):
     """Check if file extension is allowed."""
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in allowed_extensions
+    return os.path.splitext(filename)[1][1:].lower() in allowed_extensions
+
+# (threshold, unit, shift) from largest to smallest
+_SIZE_UNITS = ((1 << 30, 'GB', 30), (1 << 20, 'MB', 20), (1 << 10, 'KB', 10), (0, 'B', 0))
+
+def has_media_signature(file):
+    """Check the first bytes of an upload against known container signatures."""
+    header = file.stream.read(16)
+    file.stream.seek(0)
+    if header.startswith(MEDIA_SIGNATURES) or header[4:8] in MEDIA_BOX_TYPES:
+        return True
+    # Raw MP3/AAC streams start with an MPEG audio frame sync
+    return len(header) >= 2 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0
 
 def format_file_size(size_bytes):
     """Format file size in human readable format."""
-    if size_bytes < 1024:
-        return f"{size_bytes} B"
-    elif size_bytes < 1024 * 1024:
-        return f"{size_bytes // 1024} KB"
-    elif size_bytes < 1024 * 1024 * 1024:
-        return f"{size_bytes // (1024 * 1024)} MB"
-    else:
-        return f"{size_bytes // (1024 * 1024 * 1024)} GB"
-
-def cleanup_old_files():
-    """Clean up old uploaded and output files (older than 30 minutes)."""
-    current_time = datetime.now()
-    for folder in [app.config['UPLOAD_FOLDER'], app.config['OUTPUT_FOLDER']]:
-        if os.path.exists(folder):
-            for filename in os.listdir(folder):
-                filepath = os.path.join(folder, filename)
-                if os.path.isfile(filepath):
-                    file_time = datetime.fromtimestamp(os.path.getctime(filepath))
-                    if (current_time - file_time).total_seconds() > 1800:  # 30 minutes
-                        try:
-                            os.remove(filepath)
-                            logger.info(f"Cleaned up old file: {filepath}")
-                        except Exception as e:
-                            logger.error(f"Error cleaning up {filepath}: {e}")
+    for threshold, unit, shift in _SIZE_UNITS:
+        if size_bytes >= threshold:
+            return f"{size_bytes >> shift} {unit}"
+    return f"{size_bytes} B"
 
-def cleanup_files(file_paths):
-    """Clean up uploaded files."""
-    for filepath in file_paths:
+MAX_FILE_SIZE_TEXT = format_file_size(MAX_FILE_SIZE)
+MAX_TOTAL_SIZE_TEXT = format_file_size(MAX_TOTAL_SIZE)
+
+def make_unique_id():
+    """Return a short id that is unique across requests and worker processes."""
+    return f"{os.getpid():x}{next(_unique_counter):x}"
+
+def check_content_length():
+    """Reject oversized requests from the Content-Length header before reading the body."""
+    if request.content_length and request.content_length > MAX_TOTAL_SIZE:
+        return jsonify({'error': f'Total file size ({format_file_size(request.content_length)}) exceeds limit ({MAX_TOTAL_SIZE_TEXT})'}), 413
+    return None
+
+def save_upload(file, filepath):
+    """Move an uploaded file into place without copying its contents."""
+    stream_path = getattr(file.stream, 'name', None)
+    if UPLOAD_SAME_DEVICE and isinstance(stream_path, str):
         try:
             if os.path.exists(filepath):
                 os.remove(filepath)
-                logger.info(f"Cleaned up: {filepath}")
+            os.link(stream_path, filepath)
+            schedule_cleanup(filepath)
+            return
+        except OSError as e:
+            logger.warning(f"Could not link upload into place, copying instead: {e}")
+    file.save(filepath)
+    schedule_cleanup(filepath)
+
+def schedule_cleanup(filepath, created=None):
+    """Queue a file for removal once it is older than FILE_TTL."""
+    if created is None:
+        created = time.time()
+    with _cleanup_lock:
+        heapq.heappush(_cleanup_heap, (created + FILE_TTL, filepath))
+
+def cleanup_old_files(schedule=True):
+    """Remove expired uploaded and output files and, if schedule, queue the rest for cleanup."""
+    current_time = time.time()
+    for folder in [app.config['UPLOAD_FOLDER'], app.config['OUTPUT_FOLDER']]:
+        try:
+            entries = os.scandir(folder)
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                created = entry.stat(follow_symlinks=False).st_ctime
+                if current_time - created > FILE_TTL:
+                    try:
+                        os.unlink(entry.path)
+                        logger.info(f"Cleaned up old file: {entry.path}")
+                    except Exception as e:
+                        logger.error(f"Error cleaning up {entry.path}: {e}")
+                elif schedule:
+                    schedule_cleanup(entry.path, created)
+
+def sweep_expired_files():
+    """Remove scheduled files whose TTL has passed; return seconds until the next check."""
+    now = time.time()
+    expired = []
+    with _cleanup_lock:
+        while _cleanup_heap and _cleanup_heap[0][0] <= now:
+            expired.append(heapq.heappop(_cleanup_heap)[1])
+
+    for filepath in expired:
+        try:
+            created = os.path.getctime(filepath)
+        except OSError:
+            continue  # Already removed after processing
+        if now - created <= FILE_TTL:
+            # Replaced by a newer upload with the same name
+            schedule_cleanup(filepath, created)
+            continue
+        try:
+            os.remove(filepath)
+            logger.info(f"Cleaned up old file: {filepath}")
         except Exception as e:
             logger.error(f"Error cleaning up {filepath}: {e}")
 
-def process_with_timeout(func, *args, **kwargs):
-    """Execute a function with timeout."""
-    result = [None]
-    exception = [None]
-    
-    def target():
+    with _cleanup_lock:
+        if not _cleanup_heap:
+            return SWEEP_INTERVAL
+        return max(0, min(SWEEP_INTERVAL, _cleanup_heap[0][0] - now))
+
+def _sweeper():
+    """Background loop that removes expired files."""
+    cleanup_old_files()
+    next_scan = time.monotonic() + FULL_SCAN_INTERVAL
+    while True:
         try:
-            result[0] = func(*args, **kwargs)
+            if time.monotonic() >= next_scan:
+                # Files already scheduled are in the heap; only remove expired strays
+                cleanup_old_files(schedule=False)
+                next_scan = time.monotonic() + FULL_SCAN_INTERVAL
+            delay = sweep_expired_files()
         except Exception as e:
-            exception[0] = e
-    
-    thread = threading.Thread(target=target)
-    thread.daemon = True
-    thread.start()
-    thread.join(timeout=PROCESSING_TIMEOUT)
-    
-    if thread.is_alive():
-        logger.error("Processing timeout - killing thread")
+            logger.error(f"Error in cleanup sweeper: {e}")
+            delay = SWEEP_INTERVAL
+        time.sleep(delay)
+
+def cleanup_files(file_paths):
+    """Clean up uploaded files."""
+    # Group by directory so each file is removed with unlinkat() relative to one
+    # open directory fd instead of resolving the full path every time
+    by_folder = {}
+    for filepath in file_paths:
+        by_folder.setdefault(os.path.dirname(filepath) or '.', []).append(filepath)
+
+    for folder, paths in by_folder.items():
+        dir_fd = None
+        if os.unlink in os.supports_dir_fd:
+            try:
+                dir_fd = os.open(folder, os.O_RDONLY | os.O_DIRECTORY)
+            except OSError:
+                pass
+        try:
+            for filepath in paths:
+                try:
+                    if dir_fd is None:
+                        os.unlink(filepath)
+                    else:
+                        os.unlink(os.path.basename(filepath), dir_fd=dir_fd)
+                    logger.info(f"Cleaned up: {filepath}")
+                except FileNotFoundError:
+                    pass
+                except Exception as e:
+                    logger.error(f"Error cleaning up {filepath}: {e}")
+        finally:
+            if dir_fd is not None:
+                os.close(dir_fd)
+
+def get_executor():
+    """Return this process's job pool, creating it on first use."""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ProcessPoolExecutor(max_workers=PROCESSING_WORKERS)
+            _executor_pid = os.getpid()
+        return _executor
+
+def discard_executor(executor):
+    """Drop a broken job pool so the next job starts a fresh one."""
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+def kill_job_processes():
+    """Kill the ffmpeg processes a job left behind in this pool worker."""
+    for child in psutil.Process().children(recursive=True):
+        try:
+            child.kill()
+        except psutil.NoSuchProcess:
+            pass
+
+def run_job(func, args, kwargs):
+    """Run a job in a pool worker, stopping it after PROCESSING_TIMEOUT seconds.
+
+    The alarm starts when the worker picks the job up, so time spent queued
+    doesn't count. Only this job's processes are killed on timeout; the worker,
+    and the other jobs in the pool, keep running.
+    """
+    if not hasattr(signal, 'SIGALRM'):
+        return func(*args, **kwargs)
+    signal.signal(signal.SIGALRM, timeout_handler)
+    signal.alarm(PROCESSING_TIMEOUT)
+    try:
+        return func(*args, **kwargs)
+    except JobTimeoutError:
+        logger.error("Processing timeout - stopping job")
         return None
-    
-    if exception[0]:
-        raise exception[0]
-    
-    return result[0]
+    finally:
+        signal.alarm(0)
+        # The job may have swallowed the timeout; its ffmpeg processes are never
+        # needed past this point either way
+        kill_job_processes()
+
+def process_with_timeout(func, *args, **kwargs):
+    """Execute a function in the job pool; the worker enforces PROCESSING_TIMEOUT."""
+    executor = get_executor()
+    try:
+        return executor.submit(run_job, func, args, kwargs).result()
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory) and took the pool's in-flight
+        # jobs with it. The job that broke it would likely do so again, so it
+        # is not retried; the next job gets a fresh pool.
+        logger.error("Job pool broke - discarding it")
+        discard_executor(executor)
+        return None
+    except JobTimeoutError:
+        # The alarm went off just as the job was returning
+        logger.error("Processing timeout - stopping job")
+        return None
+
+# One merger/converter per pool worker process. They hold no per-job state, and
+# each pool worker runs a single job at a time, so sharing them is safe.
+@functools.lru_cache(maxsize=None)
+def get_merger():
+    """Return this process's VideoMerger."""
+    return VideoMerger(output_dir=app.config['OUTPUT_FOLDER'])
+
+@functools.lru_cache(maxsize=None)
+def get_converter():
+    """Return this process's AudioToVideoConverter."""
+    return AudioToVideoConverter(output_dir=app.config['OUTPUT_FOLDER'])
+
+def run_merge(video_files, output_filename, method):
+    """Merge videos; runs in a job pool worker."""
+    return get_merger().merge_videos(video_files, output_filename, method)
+
+def run_conversion(audio_path, output_filename, resolution, fps, color):
+    """Convert audio to video; runs in a job pool worker."""
+    return get_converter().convert_audio_to_video(
+        audio_path=audio_path,
+        output_name=output_filename,
+        resolution=resolution,
+        fps=fps,
+        color=color
+    )
+
+@app.before_request
+def start_sweeper():
+    """Start the cleanup thread on first request, once per (forked) worker process."""
+    global _sweeper_pid
+    pid = os.getpid()
+    if _sweeper_pid != pid:
+        with _cleanup_lock:
+            if _sweeper_pid != pid:
+                _sweeper_pid = pid
+                threading.Thread(target=_sweeper, name='file-sweeper', daemon=True).start()
+
+# index.html has no per-request context, so it is rendered once and reused
+_index_html = None
 
 @app.route('/')
 def index():
     """Main page with upload forms."""
-    cleanup_old_files()
-    return render_template('index.html')
+    global _index_html
+    if _index_html is None or app.debug:
+        _index_html = render_template('index.html').encode('utf-8')
+    response = Response(_index_html, mimetype='text/html')
+    response.headers['Cache-Control'] = 'public, max-age=60'
+    return response
 
 @app.route('/merge-videos', methods=['POST'])
 def merge_videos():
     """Handle video merging request."""
     video_files = []
     
+    too_large = check_content_length()
+    if too_large:
+        return too_large
+    
     try:
         if 'files' not in request.files:
             return jsonify({'error': 'No files uploaded'}), 400
@@ -144,19 +442,16 @@ def merge_videos():
         
         for file in files:
             if file and allowed_file(file.filename, ALLOWED_VIDEO_EXTENSIONS):
-                # Check individual file size
-                file.seek(0, 2)  # Seek to end
-                file_size = file.tell()
-                file.seek(0)  # Reset to beginning
-                
-                if file_size > MAX_FILE_SIZE:
-                    return jsonify({'error': f'File {file.filename} is too large. Maximum size is {format_file_size(MAX_FILE_SIZE)}'}), 400
+                if not has_media_signature(file):
+                    cleanup_files(video_files)
+                    return jsonify({'error': f'File {file.filename} is not a valid video file'}), 400
                 
-                total_size += file_size
+                # Per-file size was counted (and capped) while the upload streamed in
+                total_size += file.stream.size
                 
-                filename = secure_filename(file.filename)
+                filename = cached_secure_filename(file.filename)
                 filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(filepath)
+                save_upload(file, filepath)
                 video_files.append(filepath)
             else:
                 return jsonify({'error': f'Invalid file type: {file.filename}'}), 400
@@ -164,7 +459,7 @@ def merge_videos():
         # Check total size
         if total_size > MAX_TOTAL_SIZE:
             cleanup_files(video_files)
-            return jsonify({'error': f'Total file size ({format_file_size(total_size)}) exceeds limit ({format_file_size(MAX_TOTAL_SIZE)})'}), 400
+            return jsonify({'error': f'Total file size ({format_file_size(total_size)}) exceeds limit ({MAX_TOTAL_SIZE_TEXT})'}), 400
         
         if len(video_files) < 2:
             cleanup_files(video_files)
@@ -175,24 +470,18 @@ def merge_videos():
         output_name = request.form.get('output_name', 'merged_video.mp4')
         
         # Create unique output filename
-        unique_id = str(uuid.uuid4())[:8]
+        unique_id = make_unique_id()
         output_filename = f"{Path(output_name).stem}_{unique_id}.mp4"
         
         # Merge videos with timeout
-        merger = VideoMerger(output_dir=app.config['OUTPUT_FOLDER'])
-        
-        def merge_task():
-            return merger.merge_videos(video_files, output_filename, method)
-        
-        result = process_with_timeout(merge_task)
+        result = process_with_timeout(run_merge, video_files, output_filename, method)
         
         if result:
+            schedule_cleanup(result)
+
             # Clean up uploaded files
             cleanup_files(video_files)
             
-            # Force garbage collection
-            gc.collect()
-            
             return jsonify({
                 'success': True,
                 'message': 'Videos merged successfully!',
@@ -203,6 +492,9 @@ def merge_videos():
             cleanup_files(video_files)
             return jsonify({'error': 'Processing timeout or failed to merge videos'}), 500
             
+    except RequestEntityTooLarge as e:
+        cleanup_files(video_files)
+        return jsonify({'error': e.description}), 413
     except Exception as e:
         logger.error(f"Error merging videos: {e}")
         cleanup_files(video_files)
@@ -213,6 +505,10 @@ def convert_audio():
     """Handle audio to video conversion request."""
     audio_file = None
     
+    too_large = check_content_length()
+    if too_large:
+        return too_large
+    
     try:
         if 'file' not in request.files:
             return jsonify({'error': 'No file uploaded'}), 400
@@ -224,18 +520,13 @@ def convert_audio():
         if not allowed_file(file.filename, ALLOWED_AUDIO_EXTENSIONS):
             return jsonify({'error': f'Invalid file type: {file.filename}'}), 400
         
-        # Check file size
-        file.seek(0, 2)  # Seek to end
-        file_size = file.tell()
-        file.seek(0)  # Reset to beginning
+        if not has_media_signature(file):
+            return jsonify({'error': f'File {file.filename} is not a valid audio file'}), 400
         
-        if file_size > MAX_FILE_SIZE:
-            return jsonify({'error': f'File {file.filename} is too large. Maximum size is {format_file_size(MAX_FILE_SIZE)}'}), 400
-        
-        # Save uploaded file
-        filename = secure_filename(file.filename)
+        # Save uploaded file (its size was capped while the upload streamed in)
+        filename = cached_secure_filename(file.filename)
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        save_upload(file, filepath)
         audio_file = filepath
         
         # Get parameters
@@ -248,33 +539,28 @@ def convert_audio():
         output_name = request.form.get('output_name', '')
         
         # Create unique output filename
-        unique_id = str(uuid.uuid4())[:8]
+        unique_id = make_unique_id()
         if output_name:
             output_filename = f"{Path(output_name).stem}_{unique_id}.mp4"
         else:
             output_filename = f"{Path(filename).stem}_video_{unique_id}.mp4"
         
         # Convert audio to video with timeout
-        converter = AudioToVideoConverter(output_dir=app.config['OUTPUT_FOLDER'])
-        
-        def convert_task():
-            return converter.convert_audio_to_video(
-                audio_path=filepath,
-                output_name=output_filename,
-                resolution=(resolution_width, resolution_height),
-                fps=fps,
-                color=(color_r, color_g, color_b)
-            )
-        
-        result = process_with_timeout(convert_task)
+        result = process_with_timeout(
+            run_conversion,
+            filepath,
+            output_filename,
+            (resolution_width, resolution_height),
+            fps,
+            (color_r, color_g, color_b)
+        )
         
         if result:
+            schedule_cleanup(result)
+
             # Clean up uploaded file
             cleanup_files([filepath])
             
-            # Force garbage collection
-            gc.collect()
-            
             return jsonify({
                 'success': True,
                 'message': 'Audio converted to video successfully!',
@@ -285,6 +571,8 @@ def convert_audio():
             cleanup_files([filepath])
             return jsonify({'error': 'Processing timeout or failed to convert audio to video'}), 500
             
+    except RequestEntityTooLarge as e:
+        return jsonify({'error': e.description}), 413
     except Exception as e:
         logger.error(f"Error converting audio: {e}")
         if audio_file:
@@ -297,6 +585,14 @@ def download_file(filename):
     try:
         filepath = os.path.join(app.config['OUTPUT_FOLDER'], filename)
         if os.path.exists(filepath):
+            if X_ACCEL_REDIRECT_PREFIX:
+                # nginx serves the file itself with sendfile(2)
+                response = Response(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+                response.headers['X-Accel-Redirect'] = X_ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + quote(filename)
+                response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+                return response
+            # send_file hands the open file to wsgi.file_wrapper, which gunicorn
+            # serves with sendfile(2) instead of a Python read/write loop
             return send_file(filepath, as_attachment=True)
         else:
             return jsonify({'error': 'File not found'}), 404
@@ -304,17 +600,23 @@ def download_file(filename):
         logger.error(f"Error downloading file: {e}")
         return jsonify({'error': 'Error downloading file'}), 500
 
+# Render polls /health every few seconds; free disk space barely moves in between
+HEALTH_DISK_CACHE_SECONDS = 5
+
+@functools.lru_cache(maxsize=1)
+def cached_disk_usage(time_bucket):
+    """Disk usage of the working directory, recomputed once per time bucket."""
+    return shutil.disk_usage('.')
+
 @app.route('/health')
 def health():
     """Health check endpoint for Render.com."""
     try:
         # Check disk space
-        import shutil
-        total, used, free = shutil.disk_usage('.')
+        total, used, free = cached_disk_usage(int(time.time() // HEALTH_DISK_CACHE_SECONDS))
         free_gb = free / (1024**3)
         
         # Check memory usage
-        import psutil
         memory = psutil.virtual_memory()
         memory_percent = memory.percent
         
@@ -336,4 +638,21 @@ def health():
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8080))
-    app.run(host='0.0.0.0', port=port, debug=False) 
\ No newline at end of file
+    gunicorn = shutil.which('gunicorn')
+    if gunicorn:
+        # Threaded gunicorn workers instead of the single-threaded dev server;
+        # --preload imports the app once and shares it with every forked worker
+        args = [
+            gunicorn,
+            '--workers', os.environ.get('GUNICORN_WORKERS', str(os.cpu_count() or 1)),
+            '--worker-class', 'gthread',
+            '--threads', os.environ.get('GUNICORN_THREADS', '8'),
+            '--timeout', os.environ.get('GUNICORN_TIMEOUT', str(PROCESSING_TIMEOUT)),
+            '--preload',
+            '--bind', f'0.0.0.0:{port}',
+        ]
+        if os.path.isdir('/dev/shm'):
+            # Worker heartbeat files go to RAM instead of disk
+            args += ['--worker-tmp-dir', '/dev/shm']
+        os.execv(gunicorn, args + ['app:app'])
+    app.run(host='0.0.0.0', port=port, debug=False, threaded=True) 
\ No newline at end of file
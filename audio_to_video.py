@@ -6,13 +6,73 @@ Audio to Video Converter - Converts audio-only .mov files to video files with bl
 import os
 import sys
 import argparse
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from typing import Optional
 import logging
 
-from moviepy.editor import AudioFileClip, ColorClip, CompositeVideoClip
-import numpy as np
+# ffmpeg generates the solid-color video itself; MoviePy is only a fallback and
+# is imported where it is used, so startup and --list-formats don't pay for it
+from ffmpeg_utils import FFMPEG_BINARY, FFPROBE_BINARY, HW_ENCODER_ARGS, HW_PIX_FMT, detect_hw_encoder, probe_media
 
+# Standalone (CLI/GUI) logging; an application that set up logging first keeps its own
+if not logging.getLogger().handlers:
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+# x264 presets, fastest first. A still background compresses the same at any
+# preset, so the fastest one is the default.
+X264_PRESETS = ('ultrafast', 'superfast', 'veryfast', 'faster', 'fast',
+                'medium', 'slow', 'slower', 'veryslow')
+
+# x264 settings for a video track whose frames never change. Motion search and
+# lookahead find nothing to exploit on identical frames, so they are cut to the
+# minimum, and a long GOP keeps keyframes rare. Output is tiny regardless; these
+# settings trade nothing but encoder CPU time.
+X264_STILL_ARGS = [
+    '-g', '600',
+    '-keyint_min', '600',
+    '-x264-params', 'ref=1:bframes=0:me=dia:subme=1:no-mbtree=1:rc-lookahead=0'
+]
+
+# Video track used in fast mode: a 2x2 frame at 1 fps costs almost nothing to
+# encode, so the output is roughly the size of the audio. VLC, QuickTime and
+# YouTube accept it; some players and editors reject such tiny frames.
+FAST_MODE_RESOLUTION = (2, 2)
+FAST_MODE_FPS = 1
+
+# Audio file extensions the converter accepts
+_SUPPORTED_FORMATS = ('.mov', '.mp3', '.wav', '.aac', '.m4a', '.flac', '.ogg', '.wma')
+
+# ffmpeg audio arguments. MP4 holds AAC and MP3 as-is, so those are copied;
+# lossless sources get a higher AAC bitrate as there is no earlier lossy pass.
+AUDIO_COPY_ARGS = ('-c:a', 'copy')
+AUDIO_AAC_ARGS = ('-c:a', 'aac', '-b:a', '192k')
+AUDIO_AAC_LOSSLESS_ARGS = ('-c:a', 'aac', '-b:a', '320k')
+
+# Audio arguments by probed source codec; other codecs get AUDIO_AAC_ARGS
+AUDIO_ARGS_BY_CODEC = {
+    'aac': AUDIO_COPY_ARGS,
+    'mp3': AUDIO_COPY_ARGS,
+    'flac': AUDIO_AAC_LOSSLESS_ARGS,
+    'alac': AUDIO_AAC_LOSSLESS_ARGS,
+}
+
+# Audio arguments by extension, used when ffprobe is unavailable to check the
+# codec; other extensions (.mov, .wav, .ogg, ...) get AUDIO_AAC_ARGS
+AUDIO_ARGS_BY_SUFFIX = {
+    '.m4a': AUDIO_COPY_ARGS,
+    '.aac': AUDIO_COPY_ARGS,
+    '.mp3': AUDIO_COPY_ARGS,
+    '.flac': AUDIO_AAC_LOSSLESS_ARGS,
+}
+
+# lavfi source for the background; emitting the encoder's pixel format avoids a
+# per-frame conversion
+COLOR_SOURCE = 'color=c=0x{:02x}{:02x}{:02x}:s={}x{}:r={},format={}'
 
 class AudioToVideoConverter:
     """A class to convert audio-only files to video files with black pixels."""
@@ -27,12 +87,29 @@ class AudioToVideoConverter:
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
         
-        # Setup logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
         self.logger = logging.getLogger(__name__)
+        
+        # ffprobe results cached by probe_media
+        self._probe_cache = {}
+        
+        # Hardware H.264 encoder; detection runs test encodes, so it waits until
+        # a conversion asks for one. '' once detection found none.
+        self._hw_encoder = None
+    
+    @property
+    def hw_encoder(self) -> Optional[str]:
+        """Hardware H.264 encoder to prefer over libx264, detected on first use."""
+        if self._hw_encoder is None:
+            self._hw_encoder = detect_hw_encoder() or ''
+        return self._hw_encoder or None
+    
+    @staticmethod
+    def _audio_stream(probe: dict) -> Optional[dict]:
+        """Return the first audio stream of an ffprobe result, if any."""
+        for stream in probe.get('streams', []):
+            if stream.get('codec_type') == 'audio':
+                return stream
+        return None
     
     def validate_audio_file(self, file_path: str) -> bool:
         """
@@ -44,7 +121,18 @@ class AudioToVideoConverter:
         Returns:
             bool: True if valid audio file, False otherwise
         """
+        if FFPROBE_BINARY:
+            try:
+                if self._audio_stream(probe_media(file_path, self._probe_cache)):
+                    return True
+                self.logger.error(f"Invalid audio file {file_path}: no audio stream")
+                return False
+            except Exception as e:
+                self.logger.error(f"Invalid audio file {file_path}: {e}")
+                return False
+        
         try:
+            from moviepy.editor import AudioFileClip
             clip = AudioFileClip(file_path)
             clip.close()
             return True
@@ -60,16 +148,36 @@ class AudioToVideoConverter:
             file_path (str): Path to the audio file
             
         Returns:
-            dict: Audio information including duration, sample rate
+            dict: Audio information including duration, sample rate, codec
         """
+        if FFPROBE_BINARY:
+            try:
+                probe = probe_media(file_path, self._probe_cache)
+                stream = self._audio_stream(probe)
+                duration = probe.get('format', {}).get('duration') or stream.get('duration')
+                sample_rate = int(stream['sample_rate']) if stream.get('sample_rate') else None
+                return {
+                    'path': file_path,
+                    'duration': float(duration),
+                    'fps': sample_rate,
+                    'filename': Path(file_path).name,
+                    'sample_rate': sample_rate,
+                    'codec_name': stream.get('codec_name')
+                }
+            except Exception as e:
+                self.logger.error(f"Error getting audio info for {file_path}: {e}")
+                return None
+        
         try:
+            from moviepy.editor import AudioFileClip
             clip = AudioFileClip(file_path)
             info = {
                 'path': file_path,
                 'duration': clip.duration,
                 'fps': clip.fps,
                 'filename': Path(file_path).name,
-                'sample_rate': getattr(clip, 'fps', None)  # Audio sample rate
+                'sample_rate': getattr(clip, 'fps', None),  # Audio sample rate
+                'codec_name': None
             }
             clip.close()
             return info
@@ -79,7 +187,10 @@ class AudioToVideoConverter:
     
     def convert_audio_to_video(self, audio_path: str, output_name: str = None, 
                               resolution: tuple = (1920, 1080), fps: int = 30,
-                              color: tuple = (0, 0, 0)) -> Optional[str]:
+                              color: tuple = (0, 0, 0), preset: str = "ultrafast",
+                              tune: str = "stillimage", threads: Optional[int] = None,
+                              fast_mode: bool = False, faststart: bool = False,
+                              use_hw_encoder: bool = True) -> Optional[str]:
         """
         Convert audio file to video file with black pixels.
         
@@ -89,6 +200,15 @@ class AudioToVideoConverter:
             resolution (tuple): Video resolution (width, height) - default 1920x1080
             fps (int): Frames per second - default 30
             color (tuple): RGB color for video background - default black (0,0,0)
+            preset (str): x264 encoder preset - default ultrafast
+            tune (str): x264 tuning - default stillimage
+            threads (int): Encoder and filter threads to use (default: all CPU cores)
+            fast_mode (bool): Use a tiny 2x2, 1 fps video track instead of resolution/fps;
+                some players and editors won't accept the micro-resolution
+            faststart (bool): Move the index to the front for progressive streaming;
+                costs a second pass over the file, so it is off by default
+            use_hw_encoder (bool): Encode with the detected hardware encoder, falling
+                back to libx264 if it fails; ignored in fast mode
             
         Returns:
             str: Path to the converted video file, or None if failed
@@ -102,104 +222,251 @@ class AudioToVideoConverter:
         if not audio_info:
             return None
         
+        if fast_mode:
+            resolution, fps = FAST_MODE_RESOLUTION, FAST_MODE_FPS
+        if threads is None:
+            threads = os.cpu_count() or 4
+        
         self.logger.info(f"Converting audio: {audio_info['filename']}")
         self.logger.info(f"Duration: {audio_info['duration']:.2f}s")
         self.logger.info(f"Resolution: {resolution[0]}x{resolution[1]}")
         self.logger.info(f"FPS: {fps}")
         
+        # Generate output filename if not provided
+        if output_name is None:
+            audio_name = Path(audio_path).stem
+            output_name = f"{audio_name}_video.mp4"
+        
+        output_path = self.output_dir / output_name
+        self.logger.info(f"Saving video to: {output_path}")
+        
+        # Write next to the target and rename, so a failed run never leaves a
+        # truncated file under the final name. The part file keeps the output's
+        # extension, which is what picks the container (MP4 when there is none).
+        part_path = output_path.with_name(f"{output_path.stem}.part{output_path.suffix or '.mp4'}")
         try:
-            # Load audio clip
-            self.logger.info("Loading audio file...")
-            audio_clip = AudioFileClip(audio_path)
-            
-            # Create black video clip
-            self.logger.info("Creating video background...")
-            video_clip = ColorClip(
-                size=resolution,
-                color=color,
-                duration=audio_clip.duration
-            )
-            
-            # Combine audio and video
-            self.logger.info("Combining audio and video...")
-            final_clip = video_clip.with_audio(audio_clip)
-            
-            # Set the FPS for the final clip
-            final_clip = final_clip.with_fps(fps)
-            
-            # Generate output filename if not provided
-            if output_name is None:
-                audio_name = Path(audio_path).stem
-                output_name = f"{audio_name}_video.mp4"
-            
-            # Save the video
-            output_path = self.output_dir / output_name
-            self.logger.info(f"Saving video to: {output_path}")
-            
-            final_clip.write_videofile(
-                str(output_path),
-                codec='libx264',
-                audio_codec='aac',
-                temp_audiofile='temp-audio.m4a',
-                remove_temp=True,
-                logger=None  # Suppress moviepy's verbose output
-            )
-            
-            # Clean up
-            final_clip.close()
-            audio_clip.close()
-            video_clip.close()
+            if FFMPEG_BINARY:
+                # A 2x2 frame is below the hardware encoders' minimum size
+                encoder = self.hw_encoder if use_hw_encoder and not fast_mode else None
+                args = (audio_path, part_path, resolution, fps, color, preset, tune,
+                        threads, audio_info['codec_name'], faststart)
+                try:
+                    self._convert_with_ffmpeg(*args, video_encoder=encoder)
+                except subprocess.CalledProcessError as e:
+                    if not encoder:
+                        raise
+                    stderr = e.stderr.decode(errors='replace').strip() if e.stderr else ''
+                    self.logger.warning(f"{encoder} failed, retrying with libx264: {stderr}")
+                    self._convert_with_ffmpeg(*args)
+            else:
+                self.logger.warning("ffmpeg not found on PATH, falling back to MoviePy")
+                self._convert_with_moviepy(audio_path, part_path, resolution, fps, color, threads)
+            os.replace(part_path, output_path)
             
             self.logger.info(f"✅ Audio to video conversion completed successfully!")
             self.logger.info(f"📁 Output file: {output_path}")
             
             return str(output_path)
             
+        except subprocess.CalledProcessError as e:
+            stderr = e.stderr.decode(errors='replace').strip() if e.stderr else ''
+            self.logger.error(f"Error converting audio to video: ffmpeg exited with {e.returncode}: {stderr}")
+            return None
         except Exception as e:
             self.logger.error(f"Error converting audio to video: {e}")
             return None
+        finally:
+            part_path.unlink(missing_ok=True)
+    
+    def _convert_with_ffmpeg(self, audio_path: str, output_path: Path, resolution: tuple,
+                             fps: int, color: tuple, preset: str, tune: str,
+                             threads: Optional[int] = None, source_codec: Optional[str] = None,
+                             faststart: bool = False, video_encoder: Optional[str] = None):
+        """
+        Mux the audio with a solid-color video track generated by ffmpeg.
+        
+        ffmpeg's lavfi color source draws the frame once and hands the encoder
+        references to it, so no frames are generated in Python or piped between
+        processes. The source emits yuv420p itself, so there is no per-frame
+        RGB to YUV conversion ahead of the encoder. Muxer writes are buffered
+        rather than flushed per packet. Audio arguments are looked up per source
+        codec (or extension), so AAC and MP3 are copied instead of re-encoded.
+        
+        Args:
+            audio_path (str): Path to the audio file
+            output_path (Path): Path of the video file to write
+            resolution (tuple): Video resolution (width, height)
+            fps (int): Frames per second
+            color (tuple): RGB color for video background
+            preset (str): x264 encoder preset
+            tune (str): x264 tuning
+            threads (int): Encoder and filter threads to use (optional)
+            source_codec (str): Codec of the source audio, if known
+            faststart (bool): Move the index to the front of the file
+            video_encoder (str): Hardware encoder from HW_ENCODER_ARGS to use
+                instead of libx264 (optional)
+        """
+        if source_codec:
+            audio_args = AUDIO_ARGS_BY_CODEC.get(source_codec, AUDIO_AAC_ARGS)
+        else:
+            audio_args = AUDIO_ARGS_BY_SUFFIX.get(Path(audio_path).suffix.lower(), AUDIO_AAC_ARGS)
+        if video_encoder:
+            pix_fmt = HW_PIX_FMT
+            video_args = ['-c:v', video_encoder, *HW_ENCODER_ARGS[video_encoder], '-g', '600']
+        else:
+            pix_fmt = 'yuv420p'
+            video_args = ['-c:v', 'libx264', '-preset', preset, '-tune', tune, *X264_STILL_ARGS]
+        cmd = [
+            FFMPEG_BINARY, '-y', '-hide_banner', '-loglevel', 'error',
+            '-f', 'lavfi', '-i', COLOR_SOURCE.format(*color, *resolution, fps, pix_fmt),
+            '-i', str(audio_path),
+            '-map', '0:v', '-map', '1:a:0',
+            *video_args,
+            *audio_args,
+            *(['-threads', str(threads), '-filter_threads', str(threads)] if threads else []),
+            '-shortest',
+            '-flush_packets', '0', '-max_muxing_queue_size', '9999',
+            *(['-movflags', '+faststart'] if faststart else []),
+            str(output_path)
+        ]
+        self.logger.info(f"Encoding video with ffmpeg ({video_encoder or 'libx264'})...")
+        subprocess.run(cmd, check=True, capture_output=True)
+    
+    def _convert_with_moviepy(self, audio_path: str, output_path: Path, resolution: tuple,
+                              fps: int, color: tuple, threads: Optional[int] = None):
+        """
+        Build the video with MoviePy; used when ffmpeg is not on PATH.
+        
+        Args:
+            audio_path (str): Path to the audio file
+            output_path (Path): Path of the video file to write
+            resolution (tuple): Video resolution (width, height)
+            fps (int): Frames per second
+            color (tuple): RGB color for video background
+            threads (int): Encoder threads to use (optional)
+        """
+        from moviepy.editor import AudioFileClip, ColorClip
+        
+        # Load audio clip
+        self.logger.info("Loading audio file...")
+        audio_clip = AudioFileClip(audio_path)
+        
+        # Create black video clip
+        self.logger.info("Creating video background...")
+        video_clip = ColorClip(
+            size=resolution,
+            color=color,
+            duration=audio_clip.duration
+        )
+        
+        # Attach audio and FPS in place; the with_* helpers copy the clip
+        self.logger.info("Combining audio and video...")
+        video_clip.audio = audio_clip
+        video_clip.fps = fps
+        
+        video_clip.write_videofile(
+            str(output_path),
+            codec='libx264',
+            audio_codec='aac',
+            remove_temp=True,
+            threads=threads,
+            logger=None  # Suppress moviepy's verbose output
+        )
+        
+        # Clean up
+        audio_clip.close()
+        video_clip.close()
     
     def batch_convert(self, audio_paths: list, resolution: tuple = (1920, 1080), 
-                     fps: int = 30, color: tuple = (0, 0, 0)) -> list:
+                     fps: int = 30, color: tuple = (0, 0, 0), preset: str = "ultrafast",
+                     workers: Optional[int] = None, progress_callback=None,
+                     fast_mode: bool = False, threads: Optional[int] = None,
+                     faststart: bool = False, use_hw_encoder: bool = True) -> list:
         """
-        Convert multiple audio files to video files.
+        Convert multiple audio files to video files in parallel.
         
         Args:
             audio_paths (list): List of audio file paths
             resolution (tuple): Video resolution (width, height)
             fps (int): Frames per second
             color (tuple): RGB color for video background
+            preset (str): x264 encoder preset
+            workers (int): Number of files converted at once (default: half the CPU cores)
+            progress_callback (callable): Called as progress_callback(done, total, audio_path, result)
+                each time a file finishes; result is None if it failed
+            fast_mode (bool): Use a tiny 2x2, 1 fps video track for every file
+            threads (int): Total encoder threads, split evenly between workers
+                (default: all CPU cores)
+            faststart (bool): Move each file's index to the front for streaming
+            use_hw_encoder (bool): Encode with the detected hardware encoder
             
         Returns:
             list: List of successfully converted video file paths
         """
-        successful_conversions = []
+        cores = os.cpu_count() or 4
+        if workers is None:
+            workers = max(1, cores // 2)
+        threads_per_file = max(1, (threads or cores) // workers)
         
-        for i, audio_path in enumerate(audio_paths, 1):
-            self.logger.info(f"Processing file {i}/{len(audio_paths)}: {Path(audio_path).name}")
-            
-            result = self.convert_audio_to_video(
-                audio_path=audio_path,
-                resolution=resolution,
-                fps=fps,
-                color=color
-            )
+        total = len(audio_paths)
+        results = [None] * total
+        
+        # Detect once here rather than in every worker process
+        hw_encoder = self.hw_encoder if use_hw_encoder and not fast_mode and FFMPEG_BINARY else None
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for i, audio_path in enumerate(audio_paths):
+                future = executor.submit(
+                    _convert_one, str(self.output_dir), audio_path, resolution, fps, color, preset,
+                    threads_per_file, fast_mode, faststart, hw_encoder
+                )
+                futures[future] = i
             
-            if result:
-                successful_conversions.append(result)
-            else:
-                self.logger.warning(f"Failed to convert: {audio_path}")
+            for done, future in enumerate(as_completed(futures), 1):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    self.logger.error(f"Error converting {audio_paths[i]}: {e}")
+                
+                self.logger.info(f"Finished {done}/{total}: {Path(audio_paths[i]).name}")
+                if not results[i]:
+                    self.logger.warning(f"Failed to convert: {audio_paths[i]}")
+                if progress_callback:
+                    progress_callback(done, total, audio_paths[i], results[i])
         
-        return successful_conversions
+        return [result for result in results if result]
     
-    def list_supported_formats(self) -> list:
+    @staticmethod
+    def list_supported_formats() -> tuple:
         """
-        Get list of supported audio formats.
+        Get supported audio formats.
         
         Returns:
-            list: List of supported audio file extensions
+            tuple: Supported audio file extensions
         """
-        return ['.mov', '.mp3', '.wav', '.aac', '.m4a', '.flac', '.ogg', '.wma']
+        return _SUPPORTED_FORMATS
+
+
+def _convert_one(output_dir: str, audio_path: str, resolution: tuple, fps: int,
+                 color: tuple, preset: str, threads: Optional[int],
+                 fast_mode: bool = False, faststart: bool = False,
+                 hw_encoder: Optional[str] = None) -> Optional[str]:
+    """Convert a single file in a batch worker process, with the encoder the parent detected."""
+    converter = AudioToVideoConverter(output_dir=output_dir)
+    converter._hw_encoder = hw_encoder or ''
+    return converter.convert_audio_to_video(
+        audio_path=audio_path,
+        resolution=resolution,
+        fps=fps,
+        color=color,
+        preset=preset,
+        threads=threads,
+        fast_mode=fast_mode,
+        faststart=faststart,
+        use_hw_encoder=hw_encoder is not None
+    )
 
 
 def main():
@@ -213,6 +480,7 @@ Examples:
   python audio_to_video.py audio.mov -o video.mp4
   python audio_to_video.py audio.mov -r 1280 720 -f 24
   python audio_to_video.py *.mov --batch
+  python audio_to_video.py audio.mov --fast
         """
     )
     
@@ -252,6 +520,37 @@ Examples:
         help='Background color RGB values (default: 0 0 0 for black)'
     )
     
+    parser.add_argument(
+        '-p', '--preset',
+        choices=X264_PRESETS,
+        default='ultrafast',
+        help='x264 encoder preset (default: ultrafast)'
+    )
+    
+    parser.add_argument(
+        '-t', '--threads',
+        type=int,
+        help='Encoder threads; split between files in batch mode (default: all CPU cores)'
+    )
+    
+    parser.add_argument(
+        '--fast',
+        action='store_true',
+        help='Use a tiny 2x2, 1 fps video track; ignores -r/-f (some players reject it)'
+    )
+    
+    parser.add_argument(
+        '--faststart',
+        action='store_true',
+        help='Put the MP4 index first so the video can start playing while streaming'
+    )
+    
+    parser.add_argument(
+        '--no-hwenc',
+        action='store_true',
+        help='Always encode with libx264, even if a hardware H.264 encoder is available'
+    )
+    
     parser.add_argument(
         '-d', '--output-dir',
         default='output',
@@ -272,11 +571,8 @@ Examples:
     
     args = parser.parse_args()
     
-    # Create converter instance
-    converter = AudioToVideoConverter(output_dir=args.output_dir)
-    
     if args.list_formats:
-        formats = converter.list_supported_formats()
+        formats = AudioToVideoConverter.list_supported_formats()
         print("Supported audio formats:")
         for fmt in formats:
             print(f"  {fmt}")
@@ -290,10 +586,13 @@ Examples:
         else:
             print(f"Warning: Audio file not found: {audio_path}")
     
-    if not args.list_formats and not valid_files:
+    if not valid_files:
         print("Error: No valid audio files provided")
         sys.exit(1)
     
+    # Create converter instance
+    converter = AudioToVideoConverter(output_dir=args.output_dir)
+    
     # Convert audio to video
     if valid_files:
         if args.batch or len(valid_files) > 1:
@@ -302,7 +601,12 @@ Examples:
                 audio_paths=valid_files,
                 resolution=tuple(args.resolution),
                 fps=args.fps,
-                color=tuple(args.color)
+                color=tuple(args.color),
+                preset=args.preset,
+                fast_mode=args.fast,
+                threads=args.threads,
+                faststart=args.faststart,
+                use_hw_encoder=not args.no_hwenc
             )
             
             if results:
@@ -320,7 +624,12 @@ Examples:
                 output_name=args.output,
                 resolution=tuple(args.resolution),
                 fps=args.fps,
-                color=tuple(args.color)
+                color=tuple(args.color),
+                preset=args.preset,
+                fast_mode=args.fast,
+                threads=args.threads,
+                faststart=args.faststart,
+                use_hw_encoder=not args.no_hwenc
             )
             
             if result:
@@ -8,23 +8,37 @@ from tkinter import ttk, filedialog, messagebox, scrolledtext
 import threading
 import os
 from pathlib import Path
-from audio_to_video import AudioToVideoConverter
+from audio_to_video import AudioToVideoConverter, X264_PRESETS, detect_hw_encoder
+from gui_utils import QueuedLogMixin
 
 
-class AudioToVideoGUI:
+class AudioToVideoGUI(QueuedLogMixin):
     """Graphical user interface for the audio to video converter."""
     
+    LOG_DRAIN_MS = 50
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Audio to Video Converter")
         self.root.geometry("900x700")
         self.root.resizable(True, True)
         
-        # Initialize converter
-        self.converter = AudioToVideoConverter()
         self.audio_files = []
+        self._audio_set = set()
+        
+        # Converter reused across clicks until the output directory changes
+        self._converter = None
+        self._converter_dir = None
+        
+        # Color preview state: last color drawn and the pending debounced refresh
+        self._last_rgb = (0, 0, 0)
+        self._color_preview_pending = None
         
         self.setup_ui()
+        self._start_log_queue(self.convert_button)
+        
+        # Hardware encoder detection runs test encodes; keep it off the main thread
+        threading.Thread(target=self._detect_hw_encoder, daemon=True).start()
     
     def setup_ui(self):
         """Setup the user interface."""
@@ -92,14 +106,42 @@ class AudioToVideoGUI:
         fps_entry = ttk.Entry(options_frame, textvariable=self.fps_var, width=8)
         fps_entry.grid(row=2, column=1, sticky=tk.W, pady=(10, 0))
         
+        # Encoder preset
+        ttk.Label(options_frame, text="Encoder Preset:").grid(row=3, column=0, sticky=tk.W, padx=(0, 10), pady=(10, 0))
+        self.preset_var = tk.StringVar(value="ultrafast")
+        preset_combo = ttk.Combobox(options_frame, textvariable=self.preset_var,
+                                    values=X264_PRESETS, state="readonly", width=15)
+        preset_combo.grid(row=3, column=1, sticky=tk.W, pady=(10, 0))
+        ttk.Label(options_frame, text="(ultrafast recommended)").grid(row=3, column=2, sticky=tk.W, pady=(10, 0))
+        
+        # Encoder threads
+        cores = os.cpu_count() or 4
+        ttk.Label(options_frame, text="Threads:").grid(row=4, column=0, sticky=tk.W, padx=(0, 10), pady=(10, 0))
+        self.threads_var = tk.StringVar(value=str(cores))
+        threads_spinbox = ttk.Spinbox(options_frame, from_=1, to=cores * 2, textvariable=self.threads_var, width=6)
+        threads_spinbox.grid(row=4, column=1, sticky=tk.W, pady=(10, 0))
+        ttk.Label(options_frame, text="(split between files in batch mode)").grid(row=4, column=2, sticky=tk.W, pady=(10, 0))
+        
+        # Fast mode
+        self.fast_mode_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Tiny video track (fast)",
+                        variable=self.fast_mode_var).grid(row=5, column=1, sticky=tk.W, pady=(10, 0))
+        ttk.Label(options_frame, text="(2x2 at 1 fps; some players reject it)").grid(row=5, column=2, sticky=tk.W, pady=(10, 0))
+        
+        # Hardware encoder, enabled once detection finds one
+        self.hw_encoder_var = tk.BooleanVar(value=False)
+        self.hw_encoder_check = ttk.Checkbutton(options_frame, text="Use hardware encoder (detecting...)",
+                                                variable=self.hw_encoder_var, state="disabled")
+        self.hw_encoder_check.grid(row=6, column=1, columnspan=2, sticky=tk.W, pady=(10, 0))
+        
         # Background color
-        ttk.Label(options_frame, text="Background Color:").grid(row=3, column=0, sticky=tk.W, padx=(0, 10), pady=(10, 0))
+        ttk.Label(options_frame, text="Background Color:").grid(row=7, column=0, sticky=tk.W, padx=(0, 10), pady=(10, 0))
         self.color_r = tk.StringVar(value="0")
         self.color_g = tk.StringVar(value="0")
         self.color_b = tk.StringVar(value="0")
         
         color_frame = ttk.Frame(options_frame)
-        color_frame.grid(row=3, column=1, sticky=tk.W, pady=(10, 0))
+        color_frame.grid(row=7, column=1, sticky=tk.W, pady=(10, 0))
         
         ttk.Entry(color_frame, textvariable=self.color_r, width=4).grid(row=0, column=0, padx=(0, 5))
         ttk.Label(color_frame, text="R").grid(row=0, column=1, padx=(0, 10))
@@ -117,17 +159,17 @@ class AudioToVideoGUI:
             var.trace('w', self.update_color_preview)
         
         # Output directory
-        ttk.Label(options_frame, text="Output Directory:").grid(row=4, column=0, sticky=tk.W, padx=(0, 10), pady=(10, 0))
+        ttk.Label(options_frame, text="Output Directory:").grid(row=8, column=0, sticky=tk.W, padx=(0, 10), pady=(10, 0))
         self.output_dir = tk.StringVar(value="output")
         dir_entry = ttk.Entry(options_frame, textvariable=self.output_dir, width=30)
-        dir_entry.grid(row=4, column=1, sticky=(tk.W, tk.E), padx=(0, 10), pady=(10, 0))
+        dir_entry.grid(row=8, column=1, sticky=(tk.W, tk.E), padx=(0, 10), pady=(10, 0))
         
         browse_button = ttk.Button(options_frame, text="Browse", command=self.browse_output_dir)
-        browse_button.grid(row=4, column=2, pady=(10, 0))
+        browse_button.grid(row=8, column=2, pady=(10, 0))
         
         # Convert button
-        convert_button = ttk.Button(main_frame, text="Convert to Video", command=self.convert_audio_to_video, style="Accent.TButton")
-        convert_button.grid(row=3, column=0, columnspan=3, pady=(10, 0))
+        self.convert_button = ttk.Button(main_frame, text="Convert to Video", command=self.convert_audio_to_video, style="Accent.TButton")
+        self.convert_button.grid(row=3, column=0, columnspan=3, pady=(10, 0))
         
         # Progress and log section
         log_frame = ttk.LabelFrame(main_frame, text="Progress & Log", padding="10")
@@ -159,16 +201,18 @@ class AudioToVideoGUI:
             ]
         )
         
-        for file in files:
-            if file not in self.audio_files:
-                self.audio_files.append(file)
-                self.file_listbox.insert(tk.END, os.path.basename(file))
+        new_files = [file for file in dict.fromkeys(files) if file not in self._audio_set]
+        if new_files:
+            self._audio_set.update(new_files)
+            self.audio_files.extend(new_files)
+            self.file_listbox.insert(tk.END, *[os.path.basename(file) for file in new_files])
         
         self.update_status(f"Added {len(files)} audio file(s)")
     
     def clear_files(self):
         """Clear all audio files from the list."""
         self.audio_files.clear()
+        self._audio_set.clear()
         self.file_listbox.delete(0, tk.END)
         self.update_status("Cleared all audio files")
     
@@ -179,22 +223,21 @@ class AudioToVideoGUI:
             self.output_dir.set(directory)
     
     def update_color_preview(self, *args):
-        """Update the color preview canvas."""
+        """Schedule a color preview update; bursts of edits collapse into one."""
+        if self._color_preview_pending is None:
+            self._color_preview_pending = self.root.after(30, self._refresh_color_preview)
+    
+    def _refresh_color_preview(self):
+        """Update the color preview canvas if the color changed."""
+        self._color_preview_pending = None
         try:
-            r = int(self.color_r.get())
-            g = int(self.color_g.get())
-            b = int(self.color_b.get())
-            color = f'#{r:02x}{g:02x}{b:02x}'
-            self.color_preview.configure(bg=color)
+            rgb = (int(self.color_r.get()), int(self.color_g.get()), int(self.color_b.get()))
         except ValueError:
-            pass
-    
-    def update_status(self, message):
-        """Update status message and log."""
-        self.status_var.set(message)
-        self.log_text.insert(tk.END, f"{message}\n")
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+            return
+        if rgb == self._last_rgb:
+            return
+        self.color_preview.configure(bg='#%02x%02x%02x' % rgb)
+        self._last_rgb = rgb
     
     def convert_audio_to_video(self):
         """Start the audio to video conversion process in a separate thread."""
@@ -207,86 +250,120 @@ class AudioToVideoGUI:
             width = int(self.resolution_width.get())
             height = int(self.resolution_height.get())
             fps = int(self.fps_var.get())
+            threads = max(1, int(self.threads_var.get()))
             r = int(self.color_r.get())
             g = int(self.color_g.get())
             b = int(self.color_b.get())
         except ValueError:
-            messagebox.showerror("Error", "Please enter valid numbers for resolution, FPS, and color values!")
+            messagebox.showerror("Error", "Please enter valid numbers for resolution, FPS, threads, and color values!")
+            return
+        
+        try:
+            converter = self.get_converter(self.output_dir.get())
+        except OSError as e:
+            messagebox.showerror("Error", f"Cannot use output directory: {e}")
             return
         
         # Disable convert button during processing
-        for widget in self.root.winfo_children():
-            if isinstance(widget, ttk.Button) and widget.cget("text") == "Convert to Video":
-                widget.configure(state="disabled")
+        self.convert_button.configure(state="disabled")
         
-        # Start progress bar
-        self.progress_bar.start()
+        # Start progress bar; batches report per-file progress, single files spin
+        if len(self.audio_files) > 1:
+            self.progress_bar.configure(mode='determinate', maximum=len(self.audio_files))
+            self.progress_var.set(0)
+        else:
+            self.progress_bar.configure(mode='indeterminate')
+            self.progress_bar.start()
         
         # Start conversion in separate thread
-        thread = threading.Thread(target=self._convert_thread, args=(width, height, fps, (r, g, b)))
+        thread = threading.Thread(target=self._convert_thread,
+                                  args=(converter, self.output_filename.get() or None, width, height, fps,
+                                        (r, g, b), self.preset_var.get(), self.fast_mode_var.get(), threads,
+                                        self.hw_encoder_var.get()))
         thread.daemon = True
         thread.start()
     
-    def _convert_thread(self, width, height, fps, color):
+    def _detect_hw_encoder(self):
+        """Detect a hardware encoder in the background and report it to the main loop."""
+        self.root.after(0, self._on_hw_encoder_detected, detect_hw_encoder())
+    
+    def _on_hw_encoder_detected(self, encoder):
+        """Show the detected encoder and turn the option on if there is one."""
+        self.hw_encoder_check.configure(text=f"Use hardware encoder (auto-detected: {encoder or 'none'})")
+        if encoder:
+            self.hw_encoder_check.configure(state="normal")
+            self.hw_encoder_var.set(True)
+    
+    def get_converter(self, output_dir):
+        """Return a converter for output_dir, creating one only when the directory changed."""
+        if self._converter is None or self._converter_dir != output_dir:
+            self._converter = AudioToVideoConverter(output_dir=output_dir)
+            self._converter_dir = output_dir
+        return self._converter
+    
+    def _on_batch_progress(self, done, total, audio_path, result):
+        """Show a finished batch file; runs on the Tk main loop."""
+        self.progress_var.set(done)
+        name = os.path.basename(audio_path)
+        if result:
+            self.update_status(f"[{done}/{total}] Converted {name}")
+        else:
+            self.update_status(f"[{done}/{total}] Failed to convert {name}")
+    
+    def _convert_thread(self, converter, output_name, width, height, fps, color, preset, fast_mode,
+                        threads, use_hw_encoder):
         """Thread function for audio to video conversion."""
         try:
             self.update_status("Starting audio to video conversion...")
             
-            # Create converter with custom output directory
-            converter = AudioToVideoConverter(output_dir=self.output_dir.get())
-            
             # Convert files
             if len(self.audio_files) == 1:
                 # Single file conversion
                 result = converter.convert_audio_to_video(
                     audio_path=self.audio_files[0],
-                    output_name=self.output_filename.get() if self.output_filename.get() else None,
+                    output_name=output_name,
                     resolution=(width, height),
                     fps=fps,
-                    color=color
+                    color=color,
+                    preset=preset,
+                    fast_mode=fast_mode,
+                    threads=threads,
+                    use_hw_encoder=use_hw_encoder
                 )
                 
-                # Stop progress bar
-                self.progress_bar.stop()
-                
                 if result:
                     self.update_status(f"✅ Audio to video conversion completed successfully!")
                     self.update_status(f"📁 Output file: {result}")
-                    messagebox.showinfo("Success", f"Audio converted to video successfully!\nOutput: {result}")
+                    self._finish(messagebox.showinfo, "Success", f"Audio converted to video successfully!\nOutput: {result}")
                 else:
                     self.update_status("❌ Audio to video conversion failed!")
-                    messagebox.showerror("Error", "Audio to video conversion failed! Check the log for details.")
+                    self._finish(messagebox.showerror, "Error", "Audio to video conversion failed! Check the log for details.")
             else:
                 # Batch conversion
                 results = converter.batch_convert(
                     audio_paths=self.audio_files,
                     resolution=(width, height),
                     fps=fps,
-                    color=color
+                    color=color,
+                    preset=preset,
+                    fast_mode=fast_mode,
+                    threads=threads,
+                    use_hw_encoder=use_hw_encoder,
+                    progress_callback=lambda *progress: self.root.after(0, self._on_batch_progress, *progress)
                 )
                 
-                # Stop progress bar
-                self.progress_bar.stop()
-                
                 if results:
                     self.update_status(f"✅ Successfully converted {len(results)} files:")
                     for result in results:
                         self.update_status(f"  📁 {result}")
-                    messagebox.showinfo("Success", f"Successfully converted {len(results)} audio files to video!")
+                    self._finish(messagebox.showinfo, "Success", f"Successfully converted {len(results)} audio files to video!")
                 else:
                     self.update_status("❌ No files were converted successfully!")
-                    messagebox.showerror("Error", "Audio to video conversion failed! Check the log for details.")
+                    self._finish(messagebox.showerror, "Error", "Audio to video conversion failed! Check the log for details.")
         
         except Exception as e:
-            self.progress_bar.stop()
             self.update_status(f"❌ Error: {str(e)}")
-            messagebox.showerror("Error", f"An error occurred: {str(e)}")
-        
-        finally:
-            # Re-enable convert button
-            for widget in self.root.winfo_children():
-                if isinstance(widget, ttk.Button) and widget.cget("text") == "Convert to Video":
-                    widget.configure(state="normal")
+            self._finish(messagebox.showerror, "Error", f"An error occurred: {str(e)}")
 
 
 def main():
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+ffmpeg helpers shared by the video merger and the audio to video converter.
+"""
+
+import re
+import os
+import json
+import shutil
+import functools
+import subprocess
+from typing import Optional
+
+FFMPEG_BINARY = shutil.which('ffmpeg')
+FFPROBE_BINARY = shutil.which('ffprobe')
+
+# Hardware H.264 encoders in order of preference, with their fastest settings.
+# All of them accept nv12 input.
+HW_ENCODER_ARGS = {
+    'h264_nvenc': ['-preset', 'p1', '-tune', 'll'],
+    'h264_qsv': ['-preset', 'veryfast'],
+    'h264_videotoolbox': [],
+}
+HW_PIX_FMT = 'nv12'
+
+# Probe results kept in a cache before it is reset
+PROBE_CACHE_SIZE = 256
+
+
+@functools.lru_cache(maxsize=None)
+def detect_hw_encoder() -> Optional[str]:
+    """
+    Find a hardware H.264 encoder that works on this machine.
+    
+    ffmpeg builds list encoders whose hardware or driver is missing, so each
+    listed candidate is checked with a one-frame test encode. The result is
+    cached for the life of the process.
+    
+    Returns:
+        str: Name of the first working encoder, or None
+    """
+    if not FFMPEG_BINARY:
+        return None
+    try:
+        listing = subprocess.run([FFMPEG_BINARY, '-hide_banner', '-encoders'],
+                                 capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    listed = set(re.findall(r'\b(h264_(?:nvenc|qsv|videotoolbox))\b', listing))
+    
+    for encoder, encoder_args in HW_ENCODER_ARGS.items():
+        if encoder not in listed:
+            continue
+        cmd = [
+            FFMPEG_BINARY, '-hide_banner', '-loglevel', 'error',
+            '-f', 'lavfi', '-i', f'color=s=256x256:r=1,format={HW_PIX_FMT}',
+            '-frames:v', '1', '-c:v', encoder, *encoder_args, '-f', 'null', '-'
+        ]
+        try:
+            if subprocess.run(cmd, capture_output=True, timeout=15).returncode == 0:
+                return encoder
+        except (OSError, subprocess.SubprocessError):
+            pass
+    return None
+
+
+def probe_media(file_path: str, cache: dict) -> dict:
+    """
+    Probe a file with a single ffprobe call, caching the parsed result.
+    
+    Args:
+        file_path (str): Path to the media file
+        cache (dict): Probe results keyed by (path, mtime, size), so a replaced
+            file is re-probed
+        
+    Returns:
+        dict: ffprobe's JSON output with 'format' and 'streams'
+    """
+    stat = os.stat(file_path)
+    key = (str(file_path), stat.st_mtime_ns, stat.st_size)
+    probe = cache.get(key)
+    if probe is None:
+        output = subprocess.check_output(
+            [FFPROBE_BINARY, '-v', 'error', '-print_format', 'json',
+             '-show_format', '-show_streams', str(file_path)],
+            stderr=subprocess.PIPE
+        )
+        probe = json.loads(output)
+        if len(cache) >= PROBE_CACHE_SIZE:
+            cache.clear()
+        cache[key] = probe
+    return probe
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tk helpers shared by the video merger and audio to video converter GUIs.
+"""
+
+import tkinter as tk
+import threading
+import queue
+
+
+class QueuedLogMixin:
+    """
+    Thread-safe logging and job completion for a Tk GUI.
+    
+    Worker threads never touch Tk: log lines go through a queue that the main
+    loop drains, and the end-of-job updates are handed over with root.after.
+    The GUI provides root, log_text, status_var and progress_bar, and calls
+    _start_log_queue once its widgets exist.
+    """
+    
+    # Milliseconds between flushes of the log queue
+    LOG_DRAIN_MS = 100
+    
+    def _start_log_queue(self, job_button):
+        """Start draining the log queue; job_button is re-enabled when a job finishes."""
+        self._log_q = queue.Queue()
+        self._job_button = job_button
+        self.root.after(self.LOG_DRAIN_MS, self._drain_log)
+    
+    def update_status(self, message):
+        """Update status message and log; worker threads only enqueue the message."""
+        self._log_q.put(message)
+        if threading.current_thread() is threading.main_thread():
+            self._flush_log()
+    
+    def _flush_log(self):
+        """Write all queued log messages to the log widget."""
+        messages = []
+        while True:
+            try:
+                messages.append(self._log_q.get_nowait())
+            except queue.Empty:
+                break
+        if messages:
+            self.log_text.insert(tk.END, "\n".join(messages) + "\n")
+            self.log_text.see(tk.END)
+            self.status_var.set(messages[-1])
+    
+    def _drain_log(self):
+        """Periodically flush messages queued by worker threads."""
+        self._flush_log()
+        self.root.after(self.LOG_DRAIN_MS, self._drain_log)
+    
+    def _finish(self, show_message, title, message):
+        """Hand the end-of-job UI updates to the Tk main loop."""
+        self.root.after(0, self._on_finished, show_message, title, message)
+    
+    def _on_finished(self, show_message, title, message):
+        """Stop progress, re-enable the job button and show the result."""
+        self.progress_bar.stop()
+        self._flush_log()
+        self._job_button.configure(state="normal")
+        show_message(title, message)
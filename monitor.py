@@ -5,19 +5,56 @@ Simple monitoring script for the Video Merger application.
 
 import psutil
 import os
+import sys
 import time
 from datetime import datetime
 
+# CPU readings closer together than this reuse the previous value
+CPU_SAMPLE_MIN_INTERVAL = 2.0
+
+# Non-blocking cpu_percent() measures since the previous call, so prime it once;
+# the sleep between monitor ticks is then the sampling window
+psutil.cpu_percent(interval=None)
+_last_cpu = {'time': 0.0, 'percent': None}
+
+def get_cpu_percent():
+    """CPU usage since the previous sample, without blocking."""
+    now = time.monotonic()
+    if _last_cpu['percent'] is None or now - _last_cpu['time'] >= CPU_SAMPLE_MIN_INTERVAL:
+        _last_cpu['percent'] = psutil.cpu_percent(interval=None)
+        _last_cpu['time'] = now
+    return _last_cpu['percent']
+
+# Disk usage changes slowly; re-read it at most this often
+DISK_CACHE_SECONDS = 120
+_last_disk = {'time': 0.0, 'usage': None}
+
+def get_disk_usage(path='.'):
+    """Disk (total, used, free) in bytes for path, cached for DISK_CACHE_SECONDS."""
+    now = time.monotonic()
+    if _last_disk['usage'] is None or now - _last_disk['time'] >= DISK_CACHE_SECONDS:
+        if hasattr(os, 'statvfs'):
+            st = os.statvfs(path)
+            _last_disk['usage'] = (st.f_blocks * st.f_frsize,
+                                   (st.f_blocks - st.f_bfree) * st.f_frsize,
+                                   st.f_bavail * st.f_frsize)
+        else:
+            disk = psutil.disk_usage(path)
+            _last_disk['usage'] = (disk.total, disk.used, disk.free)
+        _last_disk['time'] = now
+    return _last_disk['usage']
+
 def get_system_info():
     """Get current system information."""
+    # CPU info, read first so its window ends where the tick begins: the
+    # interval psutil measures is then exactly the sleep between ticks
+    cpu_percent = get_cpu_percent()
+    
     # Memory info
     memory = psutil.virtual_memory()
     
     # Disk info
-    disk = psutil.disk_usage('.')
-    
-    # CPU info
-    cpu_percent = psutil.cpu_percent(interval=1)
+    disk_total, disk_used, disk_free = get_disk_usage('.')
     
     return {
         'timestamp': datetime.now().isoformat(),
@@ -28,33 +65,58 @@ def get_system_info():
             'percent': round(memory.percent, 2)
         },
         'disk': {
-            'total_gb': round(disk.total / (1024**3), 2),
-            'free_gb': round(disk.free / (1024**3), 2),
-            'used_gb': round(disk.used / (1024**3), 2),
-            'percent': round((disk.used / disk.total) * 100, 2)
+            'total_gb': round(disk_total / (1024**3), 2),
+            'free_gb': round(disk_free / (1024**3), 2),
+            'used_gb': round(disk_used / (1024**3), 2),
+            'percent': round((disk_used / disk_total) * 100, 2)
         },
         'cpu_percent': round(cpu_percent, 2)
     }
 
+def _list_files(dir_name):
+    """Paths of the regular files in a directory."""
+    # scandir hands back cached entry types, so listing costs no stat per file
+    with os.scandir(dir_name) as it:
+        return [entry.path for entry in it if entry.is_file(follow_symlinks=False)]
+
+def _total_size(paths):
+    """Sum the current sizes of files, skipping any removed since they were listed."""
+    total_size = 0
+    for path in paths:
+        try:
+            total_size += os.stat(path, follow_symlinks=False).st_size
+        except FileNotFoundError:
+            pass
+    return total_size
+
+# File listings keyed by directory: (directory mtime, file paths). Adding,
+# removing or renaming a file bumps the directory's mtime, so an unchanged
+# mtime means the listing still holds. Sizes are not cached: uploads and
+# ffmpeg output grow in place without touching the directory's mtime.
+_dir_cache = {}
+
 def check_upload_directories():
     """Check upload and output directories."""
     directories = ['uploads', 'output']
     info = {}
     
     for dir_name in directories:
-        if os.path.exists(dir_name):
-            files = os.listdir(dir_name)
-            total_size = 0
-            for file in files:
-                file_path = os.path.join(dir_name, file)
-                if os.path.isfile(file_path):
-                    total_size += os.path.getsize(file_path)
-            info[dir_name] = {
-                'file_count': len(files),
-                'total_size_mb': round(total_size / (1024 * 1024), 2)
-            }
-        else:
+        try:
+            mtime = os.stat(dir_name).st_mtime_ns
+            cached = _dir_cache.get(dir_name)
+            if cached and cached[0] == mtime:
+                paths = cached[1]
+            else:
+                paths = _list_files(dir_name)
+                _dir_cache[dir_name] = (mtime, paths)
+        except (FileNotFoundError, NotADirectoryError):
+            _dir_cache.pop(dir_name, None)
             info[dir_name] = {'file_count': 0, 'total_size_mb': 0}
+            continue
+        info[dir_name] = {
+            'file_count': len(paths),
+            'total_size_mb': round(_total_size(paths) / (1024 * 1024), 2)
+        }
     
     return info
 
@@ -71,15 +133,16 @@ def main():
             # Get directory info
             dir_info = check_upload_directories()
             
-            # Print status
-            print(f"\n[{sys_info['timestamp']}]")
-            print(f"Memory: {sys_info['memory']['used_mb']:.1f}MB / {sys_info['memory']['total_mb']:.1f}MB ({sys_info['memory']['percent']:.1f}%)")
-            print(f"Disk: {sys_info['disk']['used_gb']:.1f}GB / {sys_info['disk']['total_gb']:.1f}GB ({sys_info['disk']['percent']:.1f}%)")
-            print(f"CPU: {sys_info['cpu_percent']:.1f}%")
-            
-            print("\nDirectories:")
+            # Build the status report; it is written out in one go below
+            lines = [
+                f"\n[{sys_info['timestamp']}]",
+                f"Memory: {sys_info['memory']['used_mb']:.1f}MB / {sys_info['memory']['total_mb']:.1f}MB ({sys_info['memory']['percent']:.1f}%)",
+                f"Disk: {sys_info['disk']['used_gb']:.1f}GB / {sys_info['disk']['total_gb']:.1f}GB ({sys_info['disk']['percent']:.1f}%)",
+                f"CPU: {sys_info['cpu_percent']:.1f}%",
+                "\nDirectories:"
+            ]
             for dir_name, info in dir_info.items():
-                print(f"  {dir_name}: {info['file_count']} files, {info['total_size_mb']:.1f}MB")
+                lines.append(f"  {dir_name}: {info['file_count']} files, {info['total_size_mb']:.1f}MB")
             
             # Check for warnings
             warnings = []
@@ -91,11 +154,13 @@ def main():
                 warnings.append("High CPU usage!")
             
             if warnings:
-                print("\n⚠️  Warnings:")
+                lines.append("\n⚠️  Warnings:")
                 for warning in warnings:
-                    print(f"  {warning}")
+                    lines.append(f"  {warning}")
             
-            print("\n" + "-" * 40)
+            lines.append("\n" + "-" * 40)
+            sys.stdout.write("\n".join(lines) + "\n")
+            sys.stdout.flush()
             
             # Wait 30 seconds
             time.sleep(30)
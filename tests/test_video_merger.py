@@ -0,0 +1,50 @@
+"""
+Tests for the ffmpeg command built by VideoMerger's filter-graph concatenation.
+"""
+
+import os
+import sys
+from fractions import Fraction
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import video_merger
+from video_merger import VideoMerger
+
+
+def _probe(width=640, height=360, rate='30/1', audio=True):
+    streams = [{'codec_type': 'video', 'width': width, 'height': height,
+                'avg_frame_rate': rate, 'r_frame_rate': rate}]
+    if audio:
+        streams.append({'codec_type': 'audio'})
+    return {'format': {'duration': '2.0'}, 'streams': streams}
+
+
+def _build_cmd(tmp_path, monkeypatch, probes):
+    monkeypatch.setattr(video_merger, 'FFMPEG_BINARY', 'ffmpeg')
+    merger = VideoMerger(output_dir=str(tmp_path), use_hw_encoder=False)
+    commands = []
+    monkeypatch.setattr(merger, '_run_ffmpeg', lambda cmd, *args: commands.append(cmd) or True)
+    inputs = [(f"in{i}.mp4", probe) for i, probe in enumerate(probes)]
+    assert merger._concatenate_via_ffmpeg(inputs, tmp_path / 'out.mp4')
+    return commands[0]
+
+
+def test_silent_tracks_use_their_own_input_index(tmp_path, monkeypatch):
+    cmd = _build_cmd(tmp_path, monkeypatch,
+                     [_probe(), _probe(audio=False), _probe(audio=False)])
+    graph = cmd[cmd.index('-filter_complex') + 1]
+    
+    assert cmd.count('-i') == 5
+    assert '[0:a:0]' in graph
+    assert '[3:a:0]' in graph
+    assert '[4:a:0]' in graph
+
+
+def test_frame_rate_ignores_unset_and_timebase_rates(tmp_path, monkeypatch):
+    cmd = _build_cmd(tmp_path, monkeypatch,
+                     [_probe(rate='0/0'), _probe(rate='90000/1'), _probe(rate='30000/1001')])
+    graph = cmd[cmd.index('-filter_complex') + 1]
+    
+    assert f"fps={video_merger.MAX_CONCAT_FPS}," in graph
+    assert VideoMerger._frame_rate({'avg_frame_rate': '0/0', 'r_frame_rate': '25/1'}) == Fraction(25)
@@ -6,25 +6,55 @@ Video Merger - A Python tool to merge/stitch multiple videos into a single video
 import os
 import sys
 import argparse
+import subprocess
+import tempfile
 import gc
+from fractions import Fraction
+from concurrent.futures import ThreadPoolExecutor
 import psutil
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import ClassVar, FrozenSet, List, Optional, Tuple
 import logging
 
-from moviepy.editor import VideoFileClip, concatenate_videoclips
+from moviepy.editor import CompositeVideoClip, VideoFileClip, concatenate_videoclips
 import numpy as np
 
+# Concatenation runs in ffmpeg alone when it is available: stream copy for
+# matching inputs, one filter graph otherwise; MoviePy is the fallback
+from ffmpeg_utils import FFMPEG_BINARY, FFPROBE_BINARY, HW_PIX_FMT, detect_hw_encoder, probe_media
+
+# Hardware encoder settings for merged output; unlike a still background, real
+# footage needs a balanced preset rather than the fastest one
+HW_MERGE_ARGS = {
+    'h264_nvenc': ['-preset', 'p4'],
+    'h264_qsv': ['-preset', 'medium'],
+    'h264_videotoolbox': [],
+}
+
+# Inputs opened at once; each open waits on its own ffmpeg reader process
+MAX_OPEN_THREADS = 8
+
+# Highest frame rate for re-encoded concatenations; variable-frame-rate phone
+# and webm recordings can report timebase-sized rates such as 1000 or 90000
+MAX_CONCAT_FPS = 60
+
 
 class VideoMerger:
     """A class to handle merging multiple video files into a single video."""
     
-    def __init__(self, output_dir: str = "output"):
+    # Video file extensions the merger accepts
+    SUPPORTED_FORMATS: ClassVar[FrozenSet[str]] = frozenset({
+        '.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm', '.m4v'
+    })
+    
+    def __init__(self, output_dir: str = "output", use_hw_encoder: bool = True):
         """
         Initialize the VideoMerger.
         
         Args:
             output_dir (str): Directory to save merged videos
+            use_hw_encoder (bool): Encode with a detected hardware H.264 encoder
+                instead of libx264
         """
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
@@ -35,16 +65,276 @@ class VideoMerger:
             format='%(asctime)s - %(levelname)s - %(message)s'
         )
         self.logger = logging.getLogger(__name__)
+        
+        # Handle to this process, reused by every memory log
+        self._proc = psutil.Process()
+        
+        # ffprobe results cached by probe_media
+        self._probe_cache = {}
+        
+        # H.264 encoder for re-encoded output; detection runs test encodes, so
+        # it waits until something is actually re-encoded
+        self._use_hw_encoder = use_hw_encoder
+        self._codec = None
+    
+    @property
+    def codec(self) -> str:
+        """H.264 encoder for re-encoded output, detected on first use."""
+        if self._codec is None:
+            self._codec = (detect_hw_encoder() if self._use_hw_encoder else None) or 'libx264'
+        return self._codec
     
     def get_memory_usage(self):
         """Get current memory usage in MB."""
-        process = psutil.Process(os.getpid())
-        return process.memory_info().rss / 1024 / 1024
+        return self._proc.memory_info().rss / 1024 / 1024
     
     def log_memory_usage(self, stage: str):
         """Log memory usage at different stages."""
-        memory_mb = self.get_memory_usage()
-        self.logger.info(f"Memory usage at {stage}: {memory_mb:.1f} MB")
+        # Reading the RSS is a syscall; don't pay for it when INFO is filtered out
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        self.logger.info("Memory usage at %s: %.1f MB", stage, self.get_memory_usage())
+    
+    def prefetch_files(self, file_paths: List[str]):
+        """
+        Ask the kernel to start reading files into the page cache.
+        
+        ffmpeg reads each input sequentially, one after another; prefetching lets
+        the disk read all inputs in parallel instead of stalling on each in turn.
+        
+        Args:
+            file_paths (List[str]): Paths of the files that will be read
+        """
+        if not hasattr(os, 'posix_fadvise'):
+            return
+        
+        for file_path in file_paths:
+            try:
+                fd = os.open(file_path, os.O_RDONLY)
+                try:
+                    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+                finally:
+                    os.close(fd)
+            except OSError as e:
+                self.logger.debug(f"Could not prefetch {file_path}: {e}")
+    
+    @staticmethod
+    def _stream_signature(probe: dict) -> tuple:
+        """
+        Summarize the first video and audio stream of an ffprobe result.
+        
+        Files with equal signatures can be joined by stream copy: the concat
+        demuxer needs every input to share codecs and stream parameters.
+        """
+        video = audio = None
+        for stream in probe.get('streams', []):
+            if stream.get('codec_type') == 'video' and video is None:
+                video = (stream.get('codec_name'), stream.get('profile'), stream.get('pix_fmt'),
+                         stream.get('width'), stream.get('height'), stream.get('r_frame_rate'))
+            elif stream.get('codec_type') == 'audio' and audio is None:
+                audio = (stream.get('codec_name'), stream.get('sample_rate'), stream.get('channels'))
+        return video, audio
+    
+    @staticmethod
+    def _first_stream(probe: dict, codec_type: str) -> Optional[dict]:
+        """Return the first stream of a type ('video' or 'audio') in an ffprobe result."""
+        for stream in probe.get('streams', []):
+            if stream.get('codec_type') == codec_type:
+                return stream
+        return None
+    
+    @staticmethod
+    def _frame_rate(video: dict) -> Optional[Fraction]:
+        """Average frame rate of a video stream, or None when ffprobe has none (0/0)."""
+        for key in ('avg_frame_rate', 'r_frame_rate'):
+            try:
+                rate = Fraction(video.get(key) or '0')
+            except (ValueError, ZeroDivisionError):
+                continue
+            if rate > 0:
+                return rate
+        return None
+    
+    def _concatenate_with_ffmpeg(self, video_paths: List[str], output_name: str) -> Optional[str]:
+        """
+        Concatenate videos with ffmpeg alone, keeping frames out of Python.
+        
+        Inputs that share codecs and stream parameters are joined by stream
+        copy; anything else, or a failed copy, is normalized and re-encoded in
+        one filter graph.
+        Inputs that fail to probe are skipped. Returns None when ffmpeg cannot
+        do the job, so MoviePy handles it instead.
+        
+        Args:
+            video_paths (List[str]): List of video file paths
+            output_name (str): Output file name
+            
+        Returns:
+            str: Path to the merged video, or None if the ffmpeg paths do not apply
+        """
+        if not (FFMPEG_BINARY and FFPROBE_BINARY):
+            return None
+        
+        inputs = []
+        for path in video_paths:
+            try:
+                probe = probe_media(path, self._probe_cache)
+            except (OSError, subprocess.CalledProcessError, ValueError):
+                self.logger.warning(f"Skipping invalid video file: {path}")
+                continue
+            if self._first_stream(probe, 'video') is None:
+                self.logger.warning(f"Skipping file without a video stream: {path}")
+                continue
+            inputs.append((path, probe))
+        if not inputs:
+            return None
+        
+        output_path = self.output_dir / output_name
+        joined = (len({self._stream_signature(probe) for _, probe in inputs}) == 1
+                  and self._concatenate_stream_copy([path for path, _ in inputs], output_path))
+        if not joined:
+            joined = self._concatenate_via_ffmpeg(inputs, output_path)
+        if not joined:
+            return None
+        
+        self.logger.info(f"Video merging completed successfully!")
+        self.logger.info(f"Output file: {output_path}")
+        return str(output_path)
+    
+    def _run_ffmpeg(self, cmd: List[str], output_path: Path, action: str) -> bool:
+        """Run an ffmpeg command, removing partial output and logging stderr on failure."""
+        try:
+            subprocess.run(cmd, check=True, capture_output=True)
+            return True
+        except subprocess.CalledProcessError as e:
+            stderr = e.stderr.decode(errors='replace').strip() if e.stderr else ''
+            self.logger.warning(f"{action} failed: {stderr}")
+            output_path.unlink(missing_ok=True)
+            return False
+    
+    def _concatenate_stream_copy(self, video_paths: List[str], output_path: Path) -> bool:
+        """
+        Join matching videos with ffmpeg's concat demuxer, copying streams instead of re-encoding.
+        
+        Only the first video and audio stream are kept; data and timecode
+        tracks often can't be muxed into mp4.
+        
+        Args:
+            video_paths (List[str]): Video file paths sharing codecs and stream parameters
+            output_path (Path): Path of the video file to write
+            
+        Returns:
+            bool: True if the merged video was written
+        """
+        self.logger.info(f"Inputs match, joining without re-encoding to: {output_path}")
+        
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', prefix='.concat-',
+                                         dir=self.output_dir, delete=False) as list_file:
+            for path in video_paths:
+                escaped = os.path.abspath(path).replace("'", "'\\''")
+                list_file.write(f"file '{escaped}'\n")
+        try:
+            return self._run_ffmpeg(
+                [FFMPEG_BINARY, '-y', '-hide_banner', '-loglevel', 'error',
+                 '-f', 'concat', '-safe', '0', '-i', list_file.name,
+                 '-map', '0:v:0', '-map', '0:a:0?', '-c', 'copy', str(output_path)],
+                output_path, "Stream copy"
+            )
+        finally:
+            os.unlink(list_file.name)
+    
+    def _concatenate_via_ffmpeg(self, inputs: List[Tuple[str, dict]], output_path: Path) -> bool:
+        """
+        Concatenate differing videos with ffmpeg's concat filter.
+        
+        Every input is scaled and padded to the largest frame, resampled to the
+        highest average frame rate (at most MAX_CONCAT_FPS) and given stereo 44.1 kHz audio (silence where an
+        input has none), matching what MoviePy's compose method produces.
+        
+        Args:
+            inputs (List[Tuple[str, dict]]): (path, ffprobe result) per input
+            output_path (Path): Path of the video file to write
+            
+        Returns:
+            bool: True if the merged video was written
+        """
+        try:
+            videos = [self._first_stream(probe, 'video') for _, probe in inputs]
+            width = max(int(video['width']) for video in videos) // 2 * 2
+            height = max(int(video['height']) for video in videos) // 2 * 2
+            fps = min(max(self._frame_rate(video) or 0 for video in videos), MAX_CONCAT_FPS)
+            if not fps:
+                raise ValueError("no frame rate")
+            durations = [float(probe['format']['duration']) for _, probe in inputs]
+        except (KeyError, TypeError, ValueError, ZeroDivisionError) as e:
+            self.logger.info(f"Not using ffmpeg concat, incomplete stream info: {e}")
+            return False
+        
+        input_args = []
+        for path, _ in inputs:
+            input_args += ['-i', path]
+        # Index of the next ffmpeg input; silent tracks are added after the files
+        next_input = len(inputs)
+        
+        graph = []
+        segments = []
+        has_audio = any(self._first_stream(probe, 'audio') for _, probe in inputs)
+        for i, (_, probe) in enumerate(inputs):
+            graph.append(
+                f"[{i}:v:0]scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={fps},format={{pix_fmt}}[v{i}]"
+            )
+            segments.append(f"[v{i}]")
+            if not has_audio:
+                continue
+            if self._first_stream(probe, 'audio'):
+                audio_input = f"{i}:a:0"
+            else:
+                # Silent track for inputs without audio
+                audio_input = f"{next_input}:a:0"
+                input_args += ['-f', 'lavfi', '-t', f"{durations[i]:.3f}",
+                               '-i', 'anullsrc=r=44100:cl=stereo']
+                next_input += 1
+            graph.append(f"[{audio_input}]aformat=sample_rates=44100:channel_layouts=stereo[a{i}]")
+            segments.append(f"[a{i}]")
+        graph.append(f"{''.join(segments)}concat=n={len(inputs)}:v=1:a={int(has_audio)}[v]"
+                     + ("[a]" if has_audio else ""))
+        graph = ';'.join(graph)
+        
+        def build_cmd(codec):
+            if codec == 'libx264':
+                pix_fmt, video_args = 'yuv420p', ['-c:v', 'libx264', '-preset', 'medium']
+            else:
+                pix_fmt, video_args = HW_PIX_FMT, ['-c:v', codec, *HW_MERGE_ARGS[codec]]
+            return [
+                FFMPEG_BINARY, '-y', '-hide_banner', '-loglevel', 'error',
+                *input_args,
+                '-filter_complex', graph.format(pix_fmt=pix_fmt),
+                '-map', '[v]', *(['-map', '[a]', '-c:a', 'aac'] if has_audio else []),
+                *video_args,
+                str(output_path)
+            ]
+        
+        self.logger.info(f"Concatenating with ffmpeg ({self.codec}) to: {output_path}")
+        if self._run_ffmpeg(build_cmd(self.codec), output_path, f"ffmpeg concat with {self.codec}"):
+            return True
+        if self.codec != 'libx264':
+            self.logger.info("Retrying ffmpeg concat with libx264")
+            return self._run_ffmpeg(build_cmd('libx264'), output_path, "ffmpeg concat with libx264")
+        return False
+    
+    def _is_candidate(self, file_path: str) -> bool:
+        """Cheap pre-check: a supported extension and a non-empty file."""
+        if Path(file_path).suffix.lower() not in self.SUPPORTED_FORMATS:
+            self.logger.warning(f"Skipping unsupported file type: {file_path}")
+            return False
+        try:
+            if os.path.getsize(file_path) > 0:
+                return True
+        except OSError:
+            pass
+        self.logger.warning(f"Skipping missing or empty file: {file_path}")
+        return False
     
     def validate_video_file(self, file_path: str) -> bool:
         """
@@ -76,19 +366,44 @@ class VideoMerger:
         """
         try:
             clip = VideoFileClip(file_path)
-            info = {
-                'path': file_path,
-                'duration': clip.duration,
-                'size': clip.size,
-                'fps': clip.fps,
-                'filename': Path(file_path).name
-            }
+            info = self._clip_info(clip, file_path)
             clip.close()
             return info
         except Exception as e:
             self.logger.error(f"Error getting video info for {file_path}: {e}")
             return None
     
+    @staticmethod
+    def _clip_info(clip, file_path: str) -> dict:
+        """Describe an open clip in the format returned by get_video_info."""
+        return {
+            'path': file_path,
+            'duration': clip.duration,
+            'size': clip.size,
+            'fps': clip.fps,
+            'filename': os.path.basename(file_path)
+        }
+    
+    def _open_and_probe(self, file_path: str) -> Tuple[Optional[VideoFileClip], Optional[dict]]:
+        """
+        Open a video once, for validation, information and merging alike.
+        
+        Every VideoFileClip starts an ffmpeg reader, so the open clip is kept
+        for the merge instead of reopening the file at each step.
+        
+        Args:
+            file_path (str): Path to the video file
+            
+        Returns:
+            tuple: (clip, info), or (None, None) if the file is not a valid video
+        """
+        try:
+            clip = VideoFileClip(file_path)
+        except Exception as e:
+            self.logger.error(f"Invalid video file {file_path}: {e}")
+            return None, None
+        return clip, self._clip_info(clip, file_path)
+    
     def merge_videos(self, video_paths: List[str], output_name: str = "merged_video.mp4", 
                     method: str = "concatenate") -> Optional[str]:
         """
@@ -106,37 +421,47 @@ class VideoMerger:
             self.logger.error("No video files provided")
             return None
         
-        self.log_memory_usage("start")
-        
-        # Validate all video files
-        valid_videos = []
-        for video_path in video_paths:
-            if self.validate_video_file(video_path):
-                valid_videos.append(video_path)
-            else:
-                self.logger.warning(f"Skipping invalid video file: {video_path}")
-        
-        if not valid_videos:
+        # Drop files that can't be videos before paying for an ffmpeg reader on each
+        video_paths = [path for path in video_paths if self._is_candidate(path)]
+        if not video_paths:
             self.logger.error("No valid video files found")
             return None
         
-        self.logger.info(f"Found {len(valid_videos)} valid video files")
-        
-        # Display video information
-        total_duration = 0
-        for video_path in valid_videos:
-            info = self.get_video_info(video_path)
-            if info:
-                self.logger.info(f"Video: {info['filename']} - Duration: {info['duration']:.2f}s - Size: {info['size']}")
-                total_duration += info['duration']
+        self.log_memory_usage("start")
+        self.prefetch_files(video_paths)
         
-        self.logger.info(f"Total duration will be: {total_duration:.2f}s")
+        if method == "concatenate":
+            output_path = self._concatenate_with_ffmpeg(video_paths, output_name)
+            if output_path:
+                self.log_memory_usage("end")
+                return output_path
         
+        # Open each video once, all in parallel; the same clips are validated,
+        # described and merged
+        with ThreadPoolExecutor(max_workers=min(MAX_OPEN_THREADS, len(video_paths))) as executor:
+            opened = list(executor.map(self._open_and_probe, video_paths))
+        clips = [clip for clip, _ in opened if clip is not None]
         try:
+            total_duration = 0
+            for video_path, (clip, info) in zip(video_paths, opened):
+                if clip is None:
+                    self.logger.warning(f"Skipping invalid video file: {video_path}")
+                    continue
+                self.logger.info(f"Video: {info['filename']} - Duration: {info['duration']:.2f}s - Size: {info['size']}")
+                total_duration += info['duration']
+            
+            if not clips:
+                self.logger.error("No valid video files found")
+                return None
+            
+            self.logger.info(f"Found {len(clips)} valid video files")
+            self.log_memory_usage("loaded")
+            self.logger.info(f"Total duration will be: {total_duration:.2f}s")
+            
             if method == "concatenate":
-                return self._concatenate_videos(valid_videos, output_name)
+                return self._concatenate_videos(clips, output_name)
             elif method == "overlay":
-                return self._overlay_videos(valid_videos, output_name)
+                return self._overlay_videos(clips, output_name)
             else:
                 self.logger.error(f"Unknown method: {method}")
                 return None
@@ -145,16 +470,24 @@ class VideoMerger:
             self.logger.error(f"Error merging videos: {e}")
             return None
         finally:
+            # Clean up clips
+            for clip in clips:
+                try:
+                    clip.close()
+                except Exception as e:
+                    self.logger.error(f"Error closing clips: {e}")
+            
             # Force garbage collection
             gc.collect()
             self.log_memory_usage("end")
     
-    def _concatenate_videos(self, video_paths: List[str], output_name: str) -> str:
+    def _concatenate_videos(self, clips: List[VideoFileClip], output_name: str) -> str:
         """
         Concatenate videos sequentially.
         
         Args:
-            video_paths (List[str]): List of video file paths
+            clips (List[VideoFileClip]): Open video clips; they are taken out of the
+                list and closed here once the merged video is written
             output_name (str): Output file name
             
         Returns:
@@ -163,32 +496,24 @@ class VideoMerger:
         self.logger.info("Starting video concatenation...")
         self.log_memory_usage("concatenate_start")
         
-        clips = []
+        # Take the clips over so the caller's list doesn't keep every reader
+        # alive; the concatenated clip is what holds them from here on
+        sources = clips[:]
+        del clips[:]
+        
         try:
-            # Load all video clips
-            for i, video_path in enumerate(video_paths):
-                self.logger.info(f"Loading video {i+1}/{len(video_paths)}: {Path(video_path).name}")
-                clip = VideoFileClip(video_path)
-                clips.append(clip)
-                self.log_memory_usage(f"loaded_video_{i+1}")
-            
             # Concatenate clips
-            self.logger.info("Concatenating videos...")
-            final_clip = concatenate_videoclips(clips, method="compose")
+            # "compose" blends every frame onto a canvas to handle mixed sizes;
+            # same-size clips can simply be played one after another
+            method = "chain" if len({tuple(clip.size) for clip in sources}) == 1 else "compose"
+            self.logger.info(f"Concatenating videos ({method})...")
+            final_clip = concatenate_videoclips(sources, method=method)
             self.log_memory_usage("concatenated")
             
             # Save the merged video
             output_path = self.output_dir / output_name
             self.logger.info(f"Saving merged video to: {output_path}")
-            final_clip.write_videofile(
-                str(output_path),
-                codec='libx264',
-                audio_codec='aac',
-                temp_audiofile='temp-audio.m4a',
-                remove_temp=True,
-                verbose=False,
-                logger=None
-            )
+            self._write_video(final_clip, output_path)
             
             self.logger.info(f"Video merging completed successfully!")
             self.logger.info(f"Output file: {output_path}")
@@ -199,25 +524,25 @@ class VideoMerger:
             self.logger.error(f"Error in concatenation: {e}")
             raise
         finally:
-            # Clean up clips
-            try:
-                if 'final_clip' in locals():
-                    final_clip.close()
-                for clip in clips:
+            # Clean up the composed clip and the sources it was built from
+            for clip in ([final_clip] if 'final_clip' in locals() else []) + sources:
+                try:
                     clip.close()
-            except Exception as e:
-                self.logger.error(f"Error closing clips: {e}")
+                except Exception as e:
+                    self.logger.error(f"Error closing clips: {e}")
+            del sources[:]
+            final_clip = None
             
             # Force garbage collection
             gc.collect()
             self.log_memory_usage("concatenate_end")
     
-    def _overlay_videos(self, video_paths: List[str], output_name: str) -> str:
+    def _overlay_videos(self, clips: List[VideoFileClip], output_name: str) -> str:
         """
         Overlay videos (picture-in-picture style).
         
         Args:
-            video_paths (List[str]): List of video file paths
+            clips (List[VideoFileClip]): Open video clips, main video first; the caller closes them
             output_name (str): Output file name
             
         Returns:
@@ -226,25 +551,19 @@ class VideoMerger:
         self.logger.info("Starting video overlay...")
         self.log_memory_usage("overlay_start")
         
-        if len(video_paths) < 2:
+        if len(clips) < 2:
             self.logger.error("Overlay method requires at least 2 videos")
             return None
         
-        main_clip = None
+        main_clip = clips[0]
         overlay_clips = []
         
         try:
-            # Load the main video (first video)
-            main_clip = VideoFileClip(video_paths[0])
-            
-            # Load overlay videos
-            for i, video_path in enumerate(video_paths[1:], 1):
-                self.logger.info(f"Loading overlay video {i}: {Path(video_path).name}")
-                clip = VideoFileClip(video_path)
-                # Resize overlay videos to be smaller
-                clip = clip.resize(width=main_clip.w // 4, height=main_clip.h // 4)
-                overlay_clips.append(clip)
-                self.log_memory_usage(f"loaded_overlay_{i}")
+            # Resize overlay videos to be smaller
+            overlay_size = {'width': main_clip.w // 4, 'height': main_clip.h // 4}
+            for i, clip in enumerate(clips[1:], 1):
+                self.logger.info(f"Preparing overlay video {i}: {os.path.basename(clip.filename)}")
+                overlay_clips.append(clip.resize(**overlay_size))
             
             # Position overlay videos in corners
             positions = [
@@ -254,26 +573,18 @@ class VideoMerger:
                 ('bottom-right', (main_clip.w - overlay_clips[0].w, main_clip.h - overlay_clips[0].h))
             ]
             
-            # Create composite video
-            final_clip = main_clip
+            # Create composite video: one clip rendering the main video and every
+            # overlay in a single pass, keeping the main video's length and audio
+            positioned = []
             for i, (clip, (pos_name, pos)) in enumerate(zip(overlay_clips, positions)):
-                if i < len(positions):
-                    self.logger.info(f"Adding overlay {i+1} at {pos_name}")
-                    final_clip = final_clip.set_position(pos).set_duration(clip.duration)
-                    final_clip = final_clip.set_position(pos)
+                self.logger.info(f"Adding overlay {i+1} at {pos_name}")
+                positioned.append(clip.without_audio().set_position(pos))
+            final_clip = CompositeVideoClip([main_clip, *positioned]).set_duration(main_clip.duration)
             
             # Save the merged video
             output_path = self.output_dir / output_name
             self.logger.info(f"Saving merged video to: {output_path}")
-            final_clip.write_videofile(
-                str(output_path),
-                codec='libx264',
-                audio_codec='aac',
-                temp_audiofile='temp-audio.m4a',
-                remove_temp=True,
-                verbose=False,
-                logger=None
-            )
+            self._write_video(final_clip, output_path)
             
             self.logger.info(f"Video overlay completed successfully!")
             self.logger.info(f"Output file: {output_path}")
@@ -284,12 +595,10 @@ class VideoMerger:
             self.logger.error(f"Error in overlay: {e}")
             raise
         finally:
-            # Clean up clips
+            # Clean up the composite and resized overlays; the source clips belong to the caller
             try:
                 if 'final_clip' in locals():
                     final_clip.close()
-                if main_clip:
-                    main_clip.close()
                 for clip in overlay_clips:
                     clip.close()
             except Exception as e:
@@ -299,6 +608,27 @@ class VideoMerger:
             gc.collect()
             self.log_memory_usage("overlay_end")
     
+    def _write_video(self, clip, output_path: Path):
+        """
+        Encode a clip, preferring the hardware encoder and falling back to libx264.
+        
+        Args:
+            clip: MoviePy clip to render
+            output_path (Path): Path of the video file to write
+        """
+        # Temporary audio named after the output, so concurrent merges don't share it
+        write_args = dict(audio_codec='aac', temp_audiofile=str(output_path.with_suffix('.temp-audio.m4a')),
+                          remove_temp=True, verbose=False, logger=None)
+        if self.codec != 'libx264':
+            try:
+                clip.write_videofile(str(output_path), codec=self.codec,
+                                     ffmpeg_params=['-pix_fmt', HW_PIX_FMT, *HW_MERGE_ARGS[self.codec]],
+                                     **write_args)
+                return
+            except Exception as e:
+                self.logger.warning(f"{self.codec} failed, retrying with libx264: {e}")
+        clip.write_videofile(str(output_path), codec='libx264', **write_args)
+    
     def list_supported_formats(self) -> List[str]:
         """
         Get list of supported video formats.
@@ -306,7 +636,7 @@ class VideoMerger:
         Returns:
             List[str]: List of supported video file extensions
         """
-        return ['.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm', '.m4v']
+        return sorted(self.SUPPORTED_FORMATS)
 
 
 def main():
@@ -347,6 +677,12 @@ Examples:
         help='Output directory (default: output)'
     )
     
+    parser.add_argument(
+        '--no-hwenc',
+        action='store_true',
+        help='Always encode with libx264, even if a hardware H.264 encoder is available'
+    )
+    
     parser.add_argument(
         '--list-formats',
         action='store_true',
@@ -356,7 +692,7 @@ Examples:
     args = parser.parse_args()
     
     # Create video merger instance
-    merger = VideoMerger(output_dir=args.output_dir)
+    merger = VideoMerger(output_dir=args.output_dir, use_hw_encoder=not args.no_hwenc)
     
     if args.list_formats:
         formats = merger.list_supported_formats()
@@ -9,9 +9,10 @@ import threading
 import os
 from pathlib import Path
 from video_merger import VideoMerger
+from gui_utils import QueuedLogMixin
 
 
-class VideoMergerGUI:
+class VideoMergerGUI(QueuedLogMixin):
     """Graphical user interface for the video merger."""
     
     def __init__(self, root):
@@ -20,11 +21,17 @@ class VideoMergerGUI:
         self.root.geometry("800x600")
         self.root.resizable(True, True)
         
-        # Initialize video merger
-        self.merger = VideoMerger()
+        # Merger reused across clicks until the output directory changes
+        self._merger = None
+        self._merger_dir = None
         self.video_files = []
+        self._video_set = set()
+        
+        # File dialog pattern built once from the merger's supported formats
+        self._video_patterns = " ".join(f"*{ext}" for ext in sorted(VideoMerger.SUPPORTED_FORMATS))
         
         self.setup_ui()
+        self._start_log_queue(self.merge_button)
     
     def setup_ui(self):
         """Setup the user interface."""
@@ -96,8 +103,8 @@ class VideoMergerGUI:
         browse_button.grid(row=2, column=2, pady=(10, 0))
         
         # Merge button
-        merge_button = ttk.Button(main_frame, text="Merge Videos", command=self.merge_videos, style="Accent.TButton")
-        merge_button.grid(row=3, column=0, columnspan=3, pady=(10, 0))
+        self.merge_button = ttk.Button(main_frame, text="Merge Videos", command=self.merge_videos, style="Accent.TButton")
+        self.merge_button.grid(row=3, column=0, columnspan=3, pady=(10, 0))
         
         # Progress and log section
         log_frame = ttk.LabelFrame(main_frame, text="Progress & Log", padding="10")
@@ -124,21 +131,23 @@ class VideoMergerGUI:
         files = filedialog.askopenfilenames(
             title="Select Video Files",
             filetypes=[
-                ("Video files", "*.mp4 *.avi *.mov *.mkv *.wmv *.flv *.webm *.m4v"),
+                ("Video files", self._video_patterns),
                 ("All files", "*.*")
             ]
         )
         
-        for file in files:
-            if file not in self.video_files:
-                self.video_files.append(file)
-                self.file_listbox.insert(tk.END, os.path.basename(file))
+        new_files = [file for file in dict.fromkeys(files) if file not in self._video_set]
+        if new_files:
+            self._video_set.update(new_files)
+            self.video_files.extend(new_files)
+            self.file_listbox.insert(tk.END, *[os.path.basename(file) for file in new_files])
         
         self.update_status(f"Added {len(files)} video file(s)")
     
     def clear_videos(self):
         """Clear all video files from the list."""
         self.video_files.clear()
+        self._video_set.clear()
         self.file_listbox.delete(0, tk.END)
         self.update_status("Cleared all video files")
     
@@ -148,12 +157,12 @@ class VideoMergerGUI:
         if directory:
             self.output_dir.set(directory)
     
-    def update_status(self, message):
-        """Update status message and log."""
-        self.status_var.set(message)
-        self.log_text.insert(tk.END, f"{message}\n")
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+    def get_merger(self, output_dir):
+        """Return a merger for output_dir, creating one only when the directory changed."""
+        if self._merger is None or self._merger_dir != output_dir:
+            self._merger = VideoMerger(output_dir=output_dir)
+            self._merger_dir = output_dir
+        return self._merger
     
     def merge_videos(self):
         """Start the video merging process in a separate thread."""
@@ -161,55 +170,48 @@ class VideoMergerGUI:
             messagebox.showwarning("Warning", "Please add video files first!")
             return
         
+        try:
+            merger = self.get_merger(self.output_dir.get())
+        except OSError as e:
+            messagebox.showerror("Error", f"Cannot use output directory: {e}")
+            return
+        
         # Disable merge button during processing
-        for widget in self.root.winfo_children():
-            if isinstance(widget, ttk.Button) and widget.cget("text") == "Merge Videos":
-                widget.configure(state="disabled")
+        self.merge_button.configure(state="disabled")
         
         # Start progress bar
         self.progress_bar.start()
         
-        # Start merging in separate thread
-        thread = threading.Thread(target=self._merge_videos_thread)
+        # Start merging in separate thread; Tk variables are read here, on the main thread
+        thread = threading.Thread(target=self._merge_videos_thread,
+                                  args=(merger, list(self.video_files), self.output_filename.get(),
+                                        self.method_var.get()))
         thread.daemon = True
         thread.start()
     
-    def _merge_videos_thread(self):
+    def _merge_videos_thread(self, merger, video_files, output_filename, method):
         """Thread function for merging videos."""
         try:
             self.update_status("Starting video merge process...")
             
-            # Create merger with custom output directory
-            merger = VideoMerger(output_dir=self.output_dir.get())
-            
             # Merge videos
             result = merger.merge_videos(
-                self.video_files,
-                self.output_filename.get(),
-                self.method_var.get()
+                video_files,
+                output_filename,
+                method
             )
             
-            # Stop progress bar
-            self.progress_bar.stop()
-            
             if result:
                 self.update_status(f"✅ Video merging completed successfully!")
                 self.update_status(f"📁 Output file: {result}")
-                messagebox.showinfo("Success", f"Videos merged successfully!\nOutput: {result}")
+                self._finish(messagebox.showinfo, "Success", f"Videos merged successfully!\nOutput: {result}")
             else:
                 self.update_status("❌ Video merging failed!")
-                messagebox.showerror("Error", "Video merging failed! Check the log for details.")
+                self._finish(messagebox.showerror, "Error", "Video merging failed! Check the log for details.")
         
         except Exception as e:
-            self.progress_bar.stop()
             self.update_status(f"❌ Error: {str(e)}")
-            messagebox.showerror("Error", f"An error occurred: {str(e)}")
-        
-        finally:
-            # Re-enable merge button
-            for widget in self.root.winfo_children():
-                if isinstance(widget, ttk.Button) and widget.cget("text") == "Merge Videos":
-                    widget.configure(state="normal")
+            self._finish(messagebox.showerror, "Error", f"An error occurred: {str(e)}")
 
 
 def main():